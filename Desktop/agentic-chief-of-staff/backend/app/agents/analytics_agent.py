@@ -1,8 +1,10 @@
 """Analytics Agent - Provides data analysis, metrics, and business intelligence."""
-import json
+import asyncio
 from datetime import datetime, timedelta
+from itertools import chain, islice
+from types import MappingProxyType
 from typing import Dict, Any, List
-from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.messages import HumanMessage
 
 from app.agents.base import BaseAgent, AgentState, AgentResponse
 
@@ -78,6 +80,45 @@ Response Format (JSON):
     "response_to_user": "Natural language response with key findings"
 }"""
 
+    SAMPLE_DATA_CONTEXT = """
+Sample Available Metrics:
+- Revenue: Monthly tracking, YoY comparison
+- User Engagement: DAU, MAU, session duration
+- Conversion Rates: By channel, by product
+- Customer Satisfaction: NPS, CSAT scores
+- Operational Metrics: Response time, throughput
+- Team Performance: Tasks completed, velocity
+
+Data can be filtered by:
+- Time period (daily, weekly, monthly, quarterly, yearly)
+- Department/Team
+- Product/Service
+- Region/Market
+- Customer segment
+"""
+
+    _USER_TMPL = """
+{context}
+{memory_context}
+
+Available Data Context:
+{sample_data_context}
+
+User's Analytics Request: {task}
+
+Analyze this request and provide your response in the specified JSON format.
+Include relevant metrics, insights, and visualization recommendations.
+"""
+
+    MAX_DISPLAYED_METRICS = 6
+
+    _TREND_EMOJI = MappingProxyType({'up': '📈', 'down': '📉', 'stable': '➡️'})
+    _STATUS_EMOJI = MappingProxyType({'above_target': '✅', 'on_target': '🎯', 'below_target': '⚠️'})
+    _VALUE_FORMATTERS = MappingProxyType({
+        'currency': lambda value: f"${value:,.0f}" if isinstance(value, (int, float)) else value,
+        'percent': lambda value: f"{value}%",
+    })
+
     def __init__(self):
         super().__init__(
             name="analytics",
@@ -97,57 +138,49 @@ Response Format (JSON):
     async def process(self, state: AgentState) -> AgentResponse:
         """Process analytics-related requests."""
 
+        # Retrieve relevant analytics memories while the prompt context is built
+        memories_task = asyncio.create_task(self.retrieve_memories(state['task'], limit=3))
+
         context = self._build_context(state)
 
-        # Retrieve relevant analytics memories
-        memories = await self.retrieve_memories(state['task'], limit=3)
+        # Sample data context (in production, connect to real data sources)
+        sample_data_context = self._get_sample_data_context()
+
+        memories = await memories_task
         memory_context = ""
         if memories:
             memory_context = "\n\nPrevious Analytics Context:\n" + "\n".join([
                 f"- {m['content']}" for m in memories
             ])
 
-        # Sample data context (in production, connect to real data sources)
-        sample_data_context = self._get_sample_data_context()
-
         messages = [
-            SystemMessage(content=self.system_prompt),
-            HumanMessage(content=f"""
-{context}
-{memory_context}
-
-Available Data Context:
-{sample_data_context}
-
-User's Analytics Request: {state['task']}
-
-Analyze this request and provide your response in the specified JSON format.
-Include relevant metrics, insights, and visualization recommendations.
-""")
+            self._system_msg,
+            HumanMessage(content=self._USER_TMPL.format_map({
+                'context': context,
+                'memory_context': memory_context,
+                'sample_data_context': sample_data_context,
+                'task': state['task']
+            }))
         ]
 
-        response_text = await self._call_llm(messages)
+        response_text = await self._call_llm(messages, json_mode=True)
 
         # Parse response
-        try:
-            json_start = response_text.find('{')
-            json_end = response_text.rfind('}') + 1
-            if json_start != -1 and json_end > json_start:
-                result = json.loads(response_text[json_start:json_end])
-            else:
-                result = self._create_default_response(state['task'])
-        except json.JSONDecodeError:
+        result = self._parse_json_response(response_text)
+        if result is None:
             result = self._create_default_response(state['task'])
 
         # Store important insights in memory
         if result.get('insights'):
             insights_summary = "; ".join([i.get('title', '') for i in result.get('insights', [])[:3]])
-            await self.store_memory(
-                content=f"Analytics insights for '{state['task'][:50]}': {insights_summary}",
-                memory_type='semantic',
-                conversation_id=state.get('conversation_id'),
-                importance=0.8
-            )
+            memory_content = f"Analytics insights for '{state['task'][:50]}': {insights_summary}"
+            if self._should_store(memory_content, 0.8, task=state['task']):
+                self.store_memory_in_background(
+                    content=memory_content,
+                    memory_type='semantic',
+                    conversation_id=state.get('conversation_id'),
+                    importance=0.8
+                )
 
         user_response = result.get('response_to_user', 'Analytics report generated.')
 
@@ -171,43 +204,28 @@ Include relevant metrics, insights, and visualization recommendations.
 
     def _get_sample_data_context(self) -> str:
         """Get sample data context for analysis."""
-        return """
-Sample Available Metrics:
-- Revenue: Monthly tracking, YoY comparison
-- User Engagement: DAU, MAU, session duration
-- Conversion Rates: By channel, by product
-- Customer Satisfaction: NPS, CSAT scores
-- Operational Metrics: Response time, throughput
-- Team Performance: Tasks completed, velocity
-
-Data can be filtered by:
-- Time period (daily, weekly, monthly, quarterly, yearly)
-- Department/Team
-- Product/Service
-- Region/Market
-- Customer segment
-"""
+        return self.SAMPLE_DATA_CONTEXT
 
     def _format_metrics_display(self, metrics: List[Dict]) -> str:
         """Format metrics for display."""
-        lines = ["📊 **Key Metrics**\n"]
-        for metric in metrics[:6]:
-            trend_emoji = {'up': '📈', 'down': '📉', 'stable': '➡️'}.get(metric.get('trend', 'stable'), '📊')
-            status_emoji = {'above_target': '✅', 'on_target': '🎯', 'below_target': '⚠️'}.get(metric.get('status', ''), '')
-
-            value = metric.get('value', 'N/A')
-            unit = metric.get('unit', '')
-            if unit == 'currency':
-                value = f"${value:,.0f}" if isinstance(value, (int, float)) else value
-            elif unit == 'percent':
-                value = f"{value}%"
-
-            change = metric.get('change_percent', 0)
-            change_str = f" ({'+' if change > 0 else ''}{change}%)" if change else ""
-
-            lines.append(f"{trend_emoji} **{metric.get('name', 'Metric')}**: {value}{change_str} {status_emoji}")
-
-        return "\n".join(lines)
+        # Only the first few metrics are shown, so cost is flat however large the dashboard
+        return "\n".join(chain(
+            ("📊 **Key Metrics**\n",),
+            map(self._format_metric_line, islice(metrics, self.MAX_DISPLAYED_METRICS))
+        ))
+
+    def _format_metric_line(self, metric: Dict) -> str:
+        get = metric.get
+        name, value, unit, change = get('name', 'Metric'), get('value', 'N/A'), get('unit', ''), get('change_percent', 0)
+        trend_emoji = self._TREND_EMOJI.get(get('trend', 'stable'), '📊')
+        status_emoji = self._STATUS_EMOJI.get(get('status', ''), '')
+
+        formatter = self._VALUE_FORMATTERS.get(unit)
+        if formatter:
+            value = formatter(value)
+
+        change_str = f" ({'+' if change > 0 else ''}{change}%)" if change else ""
+        return f"{trend_emoji} **{name}**: {value}{change_str} {status_emoji}"
 
     def _create_default_response(self, task: str) -> Dict[str, Any]:
         """Create default response when parsing fails."""
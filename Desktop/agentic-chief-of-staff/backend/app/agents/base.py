@@ -1,31 +1,232 @@
 """Base agent class with memory management using LangChain."""
+import asyncio
+import concurrent.futures
+import functools
+import hashlib
+import operator
+import re
+import sys
+import time
 import uuid
+import weakref
 from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
 from datetime import datetime
-from typing import Dict, Any, List, Optional, TypedDict
+from typing import Annotated, Deque, Dict, Any, Iterator, List, Optional, Set, Tuple, TypedDict
 from dataclasses import dataclass, field
-from langchain_openai import ChatOpenAI, OpenAIEmbeddings
-from langchain.memory import ConversationBufferWindowMemory
+from itertools import islice
+import httpx
+import numpy as np
+import orjson
+from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
 from app.config import settings
-from app.models.database import db_session, Agent, AgentMemory
+from app.models.database import async_db_session, session_factory, Agent, AgentMemory, Conversation
+from app.agents.memory_index import MemoryMirror
+from app.services.embeddings import embedding_batcher, get_shared_embeddings
+
+# Characters that matter when scanning for the end of a JSON object
+_JSON_STRUCTURAL = re.compile(r'[{}"\\]')
+
+# task_context keys rendered explicitly (or skipped) by _build_context
+_RAG_CONTEXT_KEYS = frozenset({'rag_context', 'rag_results', 'rag_sources'})
+
+# Agent IDs resolved by _ensure_registered, keyed by agent name
+_registered_agent_ids: Dict[str, uuid.UUID] = {}
+_registration_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = weakref.WeakKeyDictionary()
+
+# Bounds on concurrent completions, one per event loop (each request runs its own loop)
+_llm_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+# Identical LLM calls currently running, keyed by agent + prompt digest. Requests
+# run on separate event loops, so thread-safe futures are shared, not asyncio ones.
+_inflight_llm_calls: Dict[bytes, concurrent.futures.Future] = {}
+
+# Conversation metadata entries this worker recently read or wrote:
+# (conversation id, key) -> (monotonic expiry, value). Hits do not extend the expiry.
+_metadata_cache: "OrderedDict[Tuple[uuid.UUID, str], Tuple[float, Any]]" = OrderedDict()
+_METADATA_CACHE_SIZE = 1024
+
+
+def _remember_metadata(conversation_id: uuid.UUID, key: str, value: Any) -> None:
+    ttl = settings.PENDING_STATE_CACHE_SECONDS
+    if ttl <= 0:
+        return
+    cache_key = (conversation_id, key)
+    _metadata_cache[cache_key] = (time.monotonic() + ttl, value)
+    _metadata_cache.move_to_end(cache_key)
+    while len(_metadata_cache) > _METADATA_CACHE_SIZE:
+        _metadata_cache.popitem(last=False)
+
+
+@functools.lru_cache(maxsize=1024)
+def _parse_conversation_id(conversation_id: Optional[str]) -> Optional[uuid.UUID]:
+    """Parse a conversation id once per worker; None when it is not a UUID."""
+    try:
+        return uuid.UUID(conversation_id)
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+# Sync session shared by the agents of one workflow run (see conversation_turn)
+_turn_session: ContextVar[Optional[Session]] = ContextVar('_turn_session', default=None)
+
+
+@contextmanager
+def conversation_turn() -> Iterator[None]:
+    """Share one sync session across a turn's agents, so their conversation reads hit its identity map.
+
+    The session belongs to the turn, not to the caller's scoped db_session, so
+    agent commits and rollbacks never reach the endpoint's transaction. Parallel
+    agents share it, so a conversation scope on it must not span an await.
+    """
+    session = session_factory()
+    token = _turn_session.set(session)
+    try:
+        yield
+    finally:
+        _turn_session.reset(token)
+        session.close()
+
+
+# Background memory writes; drained before the request's event loop closes
+_pending_writes: Set[asyncio.Task] = set()
+
+
+async def drain_pending_writes() -> None:
+    """Wait for background memory writes scheduled on the current loop."""
+    loop = asyncio.get_running_loop()
+    pending = [task for task in _pending_writes if task.get_loop() is loop]
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
+def _extract_json_object(text: str) -> Optional[str]:
+    """Return the first balanced {...} object in ``text``, ignoring braces inside strings.
+
+    Unlike slicing from the first '{' to the last '}', trailing prose that
+    contains a brace does not end up in the slice.
+    """
+    start = text.find('{')
+    if start == -1:
+        return None
+    depth = 0
+    in_string = False
+    skip_to = start
+    for match in _JSON_STRUCTURAL.finditer(text, start):
+        pos = match.start()
+        if pos < skip_to:
+            continue
+        char = match.group()
+        if in_string:
+            if char == '\\':
+                skip_to = pos + 2
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                return text[start:pos + 1]
+    return None
+
+
+class _JsonObjectTracker:
+    """Track brace depth across streamed chunks to spot the end of the first JSON object."""
+
+    __slots__ = ('depth', 'started', 'in_string', 'escaped')
+
+    def __init__(self):
+        self.depth = 0
+        self.started = False
+        self.in_string = False
+        self.escaped = False
+
+    def feed(self, text: str) -> bool:
+        """Consume a chunk; True once the outermost object has closed."""
+        for char in text:
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == '\\':
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                if self.started:
+                    self.in_string = True
+            elif char == '{':
+                self.depth += 1
+                self.started = True
+            elif char == '}' and self.started:
+                self.depth -= 1
+                if self.depth == 0:
+                    return True
+        return False
+
+
+def _registration_lock() -> asyncio.Lock:
+    """Get the agent registration lock for the running event loop."""
+    loop = asyncio.get_running_loop()
+    lock = _registration_locks.get(loop)
+    if lock is None:
+        lock = _registration_locks[loop] = asyncio.Lock()
+    return lock
+
+
+def _llm_semaphore() -> asyncio.Semaphore:
+    """Get the completion concurrency limit for the running event loop."""
+    loop = asyncio.get_running_loop()
+    semaphore = _llm_semaphores.get(loop)
+    if semaphore is None:
+        semaphore = _llm_semaphores[loop] = asyncio.Semaphore(settings.MAX_CONCURRENT_LLM_CALLS)
+    return semaphore
+
+
+@functools.cache
+def _system_message(prompt: str) -> SystemMessage:
+    """Get the shared SystemMessage for a prompt; callers must not mutate it."""
+    return SystemMessage(content=sys.intern(prompt))
+
+
+@functools.cache
+def get_shared_llm() -> ChatOpenAI:
+    """Get the chat model shared by all agents (one HTTP connection pool)."""
+    return ChatOpenAI(
+        model=settings.OPENAI_MODEL,
+        temperature=0.7,
+        api_key=settings.OPENAI_API_KEY,
+        http_async_client=httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=50)
+        )
+    )
 
 
 class AgentState(TypedDict):
-    """State passed between agents in the graph."""
-    messages: List[Dict[str, Any]]
+    """State passed between agents in the graph.
+
+    Nodes return only what changed; ``messages``, ``results`` and
+    ``iteration_count`` are accumulated by their reducers.
+    """
+    messages: Annotated[List[Dict[str, Any]], operator.add]
     current_agent: str
     task: str
     task_context: Dict[str, Any]
-    results: List[Dict[str, Any]]
+    results: Annotated[List[Dict[str, Any]], operator.add]
     next_agent: Optional[str]
     should_continue: bool
     user_clarification_needed: bool
     clarification_question: Optional[str]
     conversation_id: str
-    iteration_count: int
+    iteration_count: Annotated[int, operator.add]
 
 
 @dataclass
@@ -44,6 +245,16 @@ class AgentResponse:
 class BaseAgent(ABC):
     """Base class for all agents with LangChain memory integration."""
 
+    CONVERSATION_HISTORY_HEADER = "\nConversation History:"
+
+    # Memories below these thresholds aren't worth an embedding call
+    MIN_MEMORY_IMPORTANCE = 0.5
+    MIN_MEMORY_TASK_LENGTH = 20
+
+    # Reuse responses to similar (not just identical) prompts; agents whose prompts
+    # differ by a recipient or date that embeddings barely register turn this off
+    SEMANTIC_CACHE_MATCHING = True
+
     def __init__(
         self,
         name: str,
@@ -52,59 +263,74 @@ class BaseAgent(ABC):
         capabilities: List[str],
         system_prompt: str
     ):
-        self.name = name
+        self.name = sys.intern(name)
         self.display_name = display_name
         self.description = description
         self.capabilities = capabilities
-        self.system_prompt = system_prompt
+        self._system_msg = _system_message(system_prompt)
+        self.system_prompt = self._system_msg.content
         self.agent_id: Optional[uuid.UUID] = None
 
-        # Initialize LLM
-        self.llm = ChatOpenAI(
-            model=settings.OPENAI_MODEL,
-            temperature=0.7,
-            api_key=settings.OPENAI_API_KEY
-        )
+        # Shared LLM and embeddings clients (memory embeddings are batched and cached).
+        # The cache key routes each agent's static system-prompt prefix to OpenAI's prompt cache.
+        self.llm = get_shared_llm().bind(extra_body={"prompt_cache_key": f"agent:{self.name}"})
+        # JSON mode: the model must answer with one JSON object, so nothing needs extracting
+        self._json_llm = self.llm.bind(response_format={"type": "json_object"})
+        self.embeddings = get_shared_embeddings()
 
-        # Initialize embeddings for memory
-        self.embeddings = OpenAIEmbeddings(
-            model=settings.OPENAI_EMBEDDING_MODEL,
-            api_key=settings.OPENAI_API_KEY
-        )
+        # Digests of recently stored memories, to skip re-embedding duplicates
+        self._recent_memory_hashes: Deque[bytes] = deque(maxlen=128)
 
         # Short-term conversation memory (last 10 exchanges)
-        self.short_term_memory = ConversationBufferWindowMemory(
-            k=10,
-            return_messages=True,
-            memory_key="chat_history"
-        )
-
-        # Register agent in database
-        self._register_agent()
-
-    def _register_agent(self):
-        """Register or update agent in database."""
-        try:
-            session = db_session()
-            agent = session.query(Agent).filter_by(name=self.name).first()
-
-            if not agent:
-                agent = Agent(
-                    name=self.name,
-                    display_name=self.display_name,
-                    description=self.description,
-                    agent_type='worker' if self.name != 'orchestrator' else 'master',
-                    capabilities=self.capabilities,
-                    system_prompt=self.system_prompt,
-                    is_active=True
-                )
-                session.add(agent)
-                session.commit()
-
-            self.agent_id = agent.id
-            session.close()
-        except Exception as e:
-            print(f"Warning: Could not register agent {self.name}: {e}")
+        self.short_term_memory: Deque[Tuple[str, str]] = deque(maxlen=10)
+
+        # Semantic response cache: prompt hash -> (normalized embedding or None for exact-only
+        # entries, response, monotonic expiry, system prompt digest)
+        self._semantic_cache: "OrderedDict[bytes, tuple[Optional[np.ndarray], str, float, bytes]]" = OrderedDict()
+        self._semantic_cache_index: Optional[tuple[List[bytes], np.ndarray, np.ndarray]] = None
+
+        # Local copy of this agent's memory embeddings for small stores
+        self._memory_mirror = MemoryMirror(refresh_seconds=settings.MEMORY_MIRROR_REFRESH_SECONDS)
+        # When the store last proved too large to mirror (monotonic), and one reload lock per loop
+        self._memory_mirror_oversized_at: Optional[float] = None
+        self._memory_mirror_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = weakref.WeakKeyDictionary()
+
+        # Registered in the database lazily, on first memory access
+        self._registered = asyncio.Event()
+
+    async def _ensure_registered(self) -> None:
+        """Register or look up the agent in the database once, before memory access."""
+        if self._registered.is_set():
+            return
+        async with _registration_lock():
+            if self._registered.is_set():
+                return
+            agent_id = _registered_agent_ids.get(self.name)
+            if agent_id is None:
+                try:
+                    async with async_db_session() as session:
+                        result = await session.execute(select(Agent.id).where(Agent.name == self.name))
+                        agent_id = result.scalar_one_or_none()
+                        if agent_id is None:
+                            agent = Agent(
+                                name=self.name,
+                                display_name=self.display_name,
+                                description=self.description,
+                                agent_type='worker' if self.name != 'orchestrator' else 'master',
+                                capabilities=self.capabilities,
+                                system_prompt=self.system_prompt,
+                                is_active=True
+                            )
+                            session.add(agent)
+                            await session.commit()
+                            agent_id = agent.id
+                except Exception as e:
+                    print(f"Warning: Could not register agent {self.name}: {e}")
+                    return
+                _registered_agent_ids[self.name] = agent_id
+
+            self.agent_id = agent_id
+            self._registered.set()
 
     async def store_memory(
         self,
@@ -115,26 +341,55 @@ class BaseAgent(ABC):
         metadata: Dict[str, Any] = None
     ):
         """Store a memory with vector embedding for future retrieval."""
+        await self._ensure_registered()
         try:
             # Generate embedding
-            embedding = self.embeddings.embed_query(content)
-
-            session = db_session()
-            memory = AgentMemory(
-                agent_id=self.agent_id,
-                conversation_id=uuid.UUID(conversation_id) if conversation_id else None,
-                memory_type=memory_type,
-                content=content,
-                importance=importance,
-                embedding=embedding,
-                metadata_=metadata or {}
-            )
-            session.add(memory)
-            session.commit()
-            session.close()
+            embedding = await embedding_batcher.embed(content)
+
+            async with async_db_session() as session:
+                memory = AgentMemory(
+                    agent_id=self.agent_id,
+                    conversation_id=uuid.UUID(conversation_id) if conversation_id else None,
+                    memory_type=memory_type,
+                    content=content,
+                    importance=importance,
+                    embedding=np.asarray(embedding, dtype=np.float16).tolist(),
+                    metadata_=metadata or {}
+                )
+                session.add(memory)
+                await session.commit()
+
+            self._memory_mirror.add({
+                'id': str(memory.id),
+                'content': memory.content,
+                'summary': memory.summary,
+                'importance': memory.importance,
+                'memory_type': memory.memory_type,
+                'metadata': memory.metadata_,
+                'created_at': memory.created_at.isoformat()
+            }, embedding)
         except Exception as e:
             print(f"Error storing memory for {self.name}: {e}")
 
+    def _should_store(self, content: str, importance: float, task: Optional[str] = None) -> bool:
+        """Decide whether a memory is worth embedding and storing."""
+        if importance < self.MIN_MEMORY_IMPORTANCE:
+            return False
+        if task is not None and len(task.strip()) < self.MIN_MEMORY_TASK_LENGTH:
+            return False
+        digest = hashlib.blake2b(content.encode("utf-8"), digest_size=16).digest()
+        if digest in self._recent_memory_hashes:
+            return False
+        self._recent_memory_hashes.append(digest)
+        return True
+
+    def store_memory_in_background(self, content: str, **kwargs) -> asyncio.Task:
+        """Schedule store_memory without blocking the caller's response."""
+        task = asyncio.create_task(self.store_memory(content, **kwargs))
+        _pending_writes.add(task)
+        task.add_done_callback(_pending_writes.discard)
+        return task
+
     async def retrieve_memories(
         self,
         query: str,
@@ -142,61 +397,146 @@ class BaseAgent(ABC):
         memory_type: Optional[str] = None
     ) -> List[Dict[str, Any]]:
         """Retrieve relevant memories using vector similarity search."""
+        await self._ensure_registered()
         try:
             # Generate query embedding
-            query_embedding = self.embeddings.embed_query(query)
-
-            session = db_session()
-
-            # Use pgvector for similarity search
-            from sqlalchemy import text
-
-            type_filter = f"AND memory_type = '{memory_type}'" if memory_type else ""
+            query_embedding = await embedding_batcher.embed(query)
+
+            mirror = await self._get_memory_mirror()
+            if mirror is not None:
+                return mirror.search(query_embedding, limit, memory_type)
+
+            # Use pgvector for similarity search (embedding bound as a vector parameter)
+            distance = AgentMemory.embedding.cosine_distance(query_embedding)
+            stmt = select(
+                AgentMemory.id,
+                AgentMemory.content,
+                AgentMemory.summary,
+                AgentMemory.importance,
+                AgentMemory.memory_type,
+                AgentMemory.metadata_,
+                AgentMemory.created_at,
+                (1 - distance).label('similarity')
+            ).where(
+                AgentMemory.agent_id == self.agent_id
+            )
+            if memory_type:
+                stmt = stmt.where(AgentMemory.memory_type == memory_type)
+            stmt = stmt.order_by(distance).limit(limit)
+
+            async with async_db_session() as session:
+                result = await session.execute(stmt)
+
+                memories = []
+                for row in result:
+                    memories.append({
+                        'id': str(row.id),
+                        'content': row.content,
+                        'summary': row.summary,
+                        'importance': row.importance,
+                        'memory_type': row.memory_type,
+                        'metadata': row.metadata_,
+                        'similarity': row.similarity,
+                        'created_at': row.created_at.isoformat()
+                    })
 
-            sql = text(f"""
-                SELECT id, content, summary, importance, memory_type, metadata, created_at,
-                       1 - (embedding <=> :embedding) as similarity
-                FROM agent_memories
-                WHERE agent_id = :agent_id {type_filter}
-                ORDER BY embedding <=> :embedding
-                LIMIT :limit
-            """)
+            return memories
+        except Exception as e:
+            print(f"Error retrieving memories for {self.name}: {e}")
+            return []
 
-            result = session.execute(sql, {
-                'embedding': str(query_embedding),
-                'agent_id': str(self.agent_id),
-                'limit': limit
-            })
+    async def _get_memory_mirror(self) -> Optional[MemoryMirror]:
+        """Get the in-process memory mirror, reloading it when stale.
 
-            memories = []
+        Returns None when disabled or when the agent has too many memories,
+        in which case the pgvector index is used instead.
+        """
+        if not settings.MEMORY_MIRROR_ENABLED:
+            return None
+        mirror = self._memory_mirror
+        if mirror.is_fresh:
+            return mirror
+        if self._memory_mirror_oversized():
+            return None
+
+        # Concurrent callers on this loop wait for one reload instead of each running it
+        loop = asyncio.get_running_loop()
+        lock = self._memory_mirror_locks.get(loop)
+        if lock is None:
+            lock = self._memory_mirror_locks[loop] = asyncio.Lock()
+        async with lock:
+            if mirror.is_fresh:
+                return mirror
+            if self._memory_mirror_oversized():
+                return None
+            return await self._reload_memory_mirror(mirror)
+
+    def _memory_mirror_oversized(self) -> bool:
+        """Whether the store was found too large to mirror within the refresh interval."""
+        oversized_at = self._memory_mirror_oversized_at
+        return oversized_at is not None and time.monotonic() - oversized_at < settings.MEMORY_MIRROR_REFRESH_SECONDS
+
+    async def _reload_memory_mirror(self, mirror: MemoryMirror) -> Optional[MemoryMirror]:
+        """Load this agent's memories into the mirror, or None when there are too many."""
+        async with async_db_session() as session:
+            count = await session.scalar(
+                select(func.count()).select_from(AgentMemory).where(
+                    AgentMemory.agent_id == self.agent_id,
+                    AgentMemory.embedding.is_not(None)
+                )
+            )
+            if count > settings.MEMORY_MIRROR_MAX_ROWS:
+                self._memory_mirror_oversized_at = time.monotonic()
+                return None
+            self._memory_mirror_oversized_at = None
+
+            result = await session.execute(
+                select(
+                    AgentMemory.id,
+                    AgentMemory.content,
+                    AgentMemory.summary,
+                    AgentMemory.importance,
+                    AgentMemory.memory_type,
+                    AgentMemory.metadata_,
+                    AgentMemory.created_at,
+                    AgentMemory.embedding
+                ).where(
+                    AgentMemory.agent_id == self.agent_id,
+                    AgentMemory.embedding.is_not(None)
+                )
+            )
+            rows, embeddings = [], []
             for row in result:
-                memories.append({
+                rows.append({
                     'id': str(row.id),
                     'content': row.content,
                     'summary': row.summary,
                     'importance': row.importance,
                     'memory_type': row.memory_type,
-                    'metadata': row.metadata,
-                    'similarity': row.similarity,
+                    'metadata': row.metadata_,
                     'created_at': row.created_at.isoformat()
                 })
+                embedding = row.embedding
+                embeddings.append(embedding.to_numpy() if hasattr(embedding, 'to_numpy') else embedding)
 
-            session.close()
-            return memories
-        except Exception as e:
-            print(f"Error retrieving memories for {self.name}: {e}")
-            return []
+        mirror.load(rows, embeddings)
+        return mirror
 
     def add_to_short_term_memory(self, human_message: str, ai_message: str):
         """Add exchange to short-term conversation memory."""
-        self.short_term_memory.save_context(
-            {"input": human_message},
-            {"output": ai_message}
-        )
+        self.short_term_memory.append((human_message, ai_message))
 
     def get_short_term_context(self) -> str:
         """Get short-term memory context as string."""
-        return self.short_term_memory.load_memory_variables({}).get('chat_history', '')
+        return "\n".join(f"Human: {human}\nAI: {ai}" for human, ai in self.short_term_memory)
+
+    def get_short_term_messages(self) -> List[Any]:
+        """Get short-term memory as alternating Human/AI messages."""
+        messages = []
+        for human, ai in self.short_term_memory:
+            messages.append(HumanMessage(content=human))
+            messages.append(AIMessage(content=ai))
+        return messages
 
     def clear_short_term_memory(self):
         """Clear short-term memory."""
@@ -220,18 +560,21 @@ class BaseAgent(ABC):
         """Build context string from state and memories."""
         context_parts = [
             f"Task: {state['task']}",
-            f"\nConversation History:",
+            self.CONVERSATION_HISTORY_HEADER,
         ]
 
-        for msg in state['messages'][-5:]:  # Last 5 messages
-            role = msg.get('role', 'unknown')
-            content = msg.get('content', '')
-            context_parts.append(f"  {role}: {content}")
+        # Last 5 messages, without copying the whole history
+        tail = list(islice(reversed(state['messages']), 5))
+        tail.reverse()
+        context_parts.extend(
+            f"  {msg.get('role', 'unknown')}: {msg.get('content', '')}" for msg in tail
+        )
 
         task_context = state.get('task_context') or {}
         if task_context:
-            rag_context = task_context.get('rag_context')
-            rag_sources = task_context.get('rag_sources')
+            tc_get = task_context.get
+            rag_context = tc_get('rag_context')
+            rag_sources = tc_get('rag_sources')
             if rag_context:
                 context_parts.append("\nRelevant Document Context:\n" + rag_context)
             if rag_sources:
@@ -240,22 +583,267 @@ class BaseAgent(ABC):
             extra_context = {
                 key: value
                 for key, value in task_context.items()
-                if key not in {'rag_context', 'rag_results', 'rag_sources'}
+                if key not in _RAG_CONTEXT_KEYS
             }
             if extra_context:
                 context_parts.append(f"\nAdditional Context: {extra_context}")
 
-        if state.get('results'):
+        results = state.get('results')
+        if results:
             context_parts.append("\nPrevious Agent Results:")
-            for result in state['results']:
-                context_parts.append(f"  - {result.get('agent_name', 'unknown')}: {result.get('summary', '')}")
+            context_parts.extend(
+                f"  - {result.get('agent_name', 'unknown')}: {result.get('summary', '')}" for result in results
+            )
 
         return "\n".join(context_parts)
 
-    async def _call_llm(self, messages: List[Any]) -> str:
-        """Call the LLM with given messages."""
-        response = await self.llm.ainvoke(messages)
-        return response.content
+    def _parse_json_response(self, response_text: str) -> Optional[Dict[str, Any]]:
+        """Extract the JSON object from an LLM response, or None if there isn't one."""
+        text = (response_text or "").strip()
+        # Replies are usually a bare object, which decodes without scanning for its end
+        if text.startswith('{') and text.endswith('}'):
+            try:
+                result = orjson.loads(text)
+            except orjson.JSONDecodeError:
+                pass
+            else:
+                if isinstance(result, dict):
+                    return result
+        block = _extract_json_object(text)
+        if block is None:
+            return None
+        try:
+            result = orjson.loads(block)
+        except orjson.JSONDecodeError:
+            return None
+        return result if isinstance(result, dict) else None
+
+    @staticmethod
+    def _is_valid_conversation_id(conversation_id: Optional[str]) -> bool:
+        return _parse_conversation_id(conversation_id) is not None
+
+    @contextmanager
+    def _conversation_scope(self, conversation_id: str) -> Iterator[Optional[Conversation]]:
+        """Load a conversation once for the turn; metadata changes are committed on exit.
+
+        The body must not await: the turn's session is shared with parallel agents.
+        """
+        conversation_uuid = _parse_conversation_id(conversation_id)
+        if conversation_uuid is None:
+            # Nothing to load, so don't check a connection out of the pool
+            yield None
+            return
+        turn_session = _turn_session.get()
+        session = turn_session or session_factory()
+        try:
+            yield session.get(Conversation, conversation_uuid)
+            if session.dirty:
+                session.commit()
+        except BaseException:
+            session.rollback()
+            raise
+        finally:
+            # A turn's session stays open for the next agent; conversation_turn closes it
+            if turn_session is None:
+                session.close()
+
+    @staticmethod
+    def _conversation_metadata(conversation: Optional[Conversation], key: str) -> Any:
+        if conversation is None:
+            return None
+        value = (conversation.metadata_ or {}).get(key)
+        _remember_metadata(conversation.id, key, value)
+        return value
+
+    def _get_conversation_metadata(self, conversation_id: str, key: str) -> Any:
+        """Read one metadata entry, from the short per-worker cache when it is still fresh."""
+        conversation_uuid = _parse_conversation_id(conversation_id)
+        if conversation_uuid is None:
+            return None
+        cached = _metadata_cache.get((conversation_uuid, key))
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1]
+        with self._conversation_scope(conversation_id) as conversation:
+            return self._conversation_metadata(conversation, key)
+
+    @staticmethod
+    def _set_conversation_metadata(conversation: Optional[Conversation], key: str, value: Any) -> None:
+        """Store one metadata entry on the conversation, or drop it when ``value`` is None."""
+        if conversation is None:
+            return
+        current = conversation.metadata_ or {}
+        # Leave the row clean when nothing changes, so the scope skips its commit
+        if value is None:
+            if key not in current:
+                return
+            metadata = dict(current)
+            del metadata[key]
+        else:
+            if current.get(key) == value:
+                return
+            metadata = dict(current)
+            metadata[key] = value
+        # Assign a new dict: an in-place edit of the JSON column is not flushed
+        conversation.metadata_ = metadata
+        _remember_metadata(conversation.id, key, value)
+
+    async def _call_llm(self, messages: List[Any], json_mode: bool = False) -> str:
+        """Call the LLM with given messages, reusing answers to near-identical prompts.
+
+        With ``json_mode`` the model is constrained to a single JSON object and the
+        stream is cut as soon as that object closes.
+        """
+        prompt = self._cacheable_prompt(messages)
+        if prompt is None:
+            return await self._complete_single_flight(messages, json_mode)
+
+        # Responses are only reused under the same system prompt (e.g. planning vs synthesis)
+        scope = self._system_prompt_digest(messages)
+        # A repeated prompt is answered before paying for its embedding
+        key = hashlib.blake2b(scope + prompt.encode("utf-8"), digest_size=16).digest()
+        cached = self._exact_cache_lookup(key)
+        if cached is not None:
+            return cached
+
+        query = None
+        if self.SEMANTIC_CACHE_MATCHING:
+            try:
+                query = self._normalize_embedding(await embedding_batcher.embed(prompt))
+                cached = self._semantic_cache_lookup(scope, query)
+                if cached is not None:
+                    return cached
+            except Exception as e:
+                print(f"Warning: Semantic cache lookup failed for {self.name}: {e}")
+
+        response_text = await self._complete_single_flight(messages, json_mode)
+        self._semantic_cache_store(key, query, response_text, scope)
+        return response_text
+
+    async def _complete_single_flight(self, messages: List[Any], json_mode: bool = False) -> str:
+        """Share one completion between concurrent callers sending identical messages."""
+        digest = hashlib.blake2b(self.name.encode("utf-8"), digest_size=16)
+        digest.update(b"\1" if json_mode else b"\0")
+        for message in messages:
+            digest.update(message.type.encode("utf-8"))
+            digest.update(b"\0")
+            digest.update(str(message.content).encode("utf-8"))
+            digest.update(b"\0")
+        key = digest.digest()
+
+        future = _inflight_llm_calls.get(key)
+        if future is not None:
+            # Shielded: cancelling one follower must not cancel the shared future
+            return await asyncio.shield(asyncio.wrap_future(future))
+
+        future = _inflight_llm_calls[key] = concurrent.futures.Future()
+        try:
+            # Only calls that reach the provider queue here; cache hits never wait
+            async with _llm_semaphore():
+                response_text = await self._complete(messages, json_mode)
+        except BaseException as e:
+            if not future.done():
+                future.set_exception(e)
+            raise
+        else:
+            if not future.done():
+                future.set_result(response_text)
+            return response_text
+        finally:
+            _inflight_llm_calls.pop(key, None)
+
+    async def _complete(self, messages: List[Any], json_mode: bool = False) -> str:
+        """Get the completion text, streaming until the JSON response object is closed."""
+        llm = self._json_llm if json_mode else self.llm
+        if not settings.LLM_STREAMING:
+            response = await llm.ainvoke(messages)
+            return response.content
+
+        parts = []
+        # Free-text answers may contain braces, so only JSON answers are cut short
+        tracker = _JsonObjectTracker() if json_mode else None
+        stream = llm.astream(messages)
+        try:
+            async for chunk in stream:
+                content = chunk.content
+                if not isinstance(content, str) or not content:
+                    continue
+                parts.append(content)
+                if tracker is not None and tracker.feed(content):
+                    break
+        finally:
+            await stream.aclose()
+        return ''.join(parts)
+
+    def _cacheable_prompt(self, messages: List[Any]) -> Optional[str]:
+        """Return the final human prompt when the semantic cache applies."""
+        if not settings.SEMANTIC_CACHE_ENABLED:
+            return None
+        for message in reversed(messages):
+            if isinstance(message, HumanMessage):
+                return message.content if isinstance(message.content, str) and message.content else None
+        return None
+
+    @staticmethod
+    def _system_prompt_digest(messages: List[Any]) -> bytes:
+        digest = hashlib.blake2b(digest_size=8)
+        for message in messages:
+            if isinstance(message, SystemMessage):
+                digest.update(str(message.content).encode("utf-8"))
+                digest.update(b"\0")
+        return digest.digest()
+
+    @staticmethod
+    def _normalize_embedding(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _exact_cache_lookup(self, key: bytes) -> Optional[str]:
+        """Return the unexpired response cached for this exact prompt, if any."""
+        entry = self._semantic_cache.get(key)
+        if entry is None:
+            return None
+        if entry[2] <= time.monotonic():
+            del self._semantic_cache[key]
+            self._semantic_cache_index = None
+            return None
+        self._semantic_cache.move_to_end(key)
+        return entry[1]
+
+    def _semantic_cache_lookup(self, scope: bytes, query: np.ndarray) -> Optional[str]:
+        """Return a cached response whose prompt is similar enough to the query."""
+        # Snapshot rows are keyed independently of LRU order, so hits don't invalidate it
+        if self._semantic_cache_index is None:
+            keys = [k for k, cached in self._semantic_cache.items() if cached[0] is not None]
+            if not keys:
+                return None
+            matrix = np.stack([self._semantic_cache[k][0] for k in keys])
+            scopes = np.array([self._semantic_cache[k][3] for k in keys], dtype=object)
+            self._semantic_cache_index = (keys, matrix, scopes)
+        keys, matrix, scopes = self._semantic_cache_index
+        scores = np.where(scopes == scope, matrix @ query, -np.inf)
+        best = int(np.argmax(scores))
+        if scores[best] < settings.SEMANTIC_CACHE_THRESHOLD:
+            return None
+
+        best_key = keys[best]
+        now = time.monotonic()
+        entry = self._semantic_cache[best_key]
+        if entry[2] <= now:
+            # Hits never extend an entry, so expired ones are dropped in one sweep
+            for stale in [k for k, cached in self._semantic_cache.items() if cached[2] <= now]:
+                del self._semantic_cache[stale]
+            self._semantic_cache_index = None
+            return None
+        self._semantic_cache.move_to_end(best_key)
+        return entry[1]
+
+    def _semantic_cache_store(self, key: bytes, query: Optional[np.ndarray], response: str, scope: bytes) -> None:
+        self._semantic_cache[key] = (query, response, time.monotonic() + settings.SEMANTIC_CACHE_TTL_SECONDS, scope)
+        self._semantic_cache.move_to_end(key)
+        while len(self._semantic_cache) > settings.SEMANTIC_CACHE_SIZE:
+            self._semantic_cache.popitem(last=False)
+        self._semantic_cache_index = None
 
     def get_capabilities_description(self) -> str:
         """Get a formatted description of agent capabilities."""
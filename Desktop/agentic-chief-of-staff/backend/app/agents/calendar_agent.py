@@ -1,15 +1,22 @@
 """Calendar Agent - Manages schedules, appointments, and time-related tasks."""
-import json
+import asyncio
+import functools
 import re
 import uuid
+from bisect import bisect_left, insort
+from contextlib import contextmanager
+from dataclasses import dataclass
 from datetime import datetime, timedelta
+from itertools import count
+from time import monotonic, time
+from types import MappingProxyType
 from zoneinfo import ZoneInfo
-from typing import Dict, Any, Optional
-from dateutil import parser as date_parser
-from langchain_core.messages import HumanMessage, SystemMessage
+from collections import OrderedDict
+from typing import Dict, Any, Iterator, Optional, Tuple
+import orjson
+from langchain_core.messages import HumanMessage
 
 from app.agents.base import BaseAgent, AgentState, AgentResponse
-from app.models.database import db_session, Conversation
 from app.services.calendar_service import (
     create_calendar_event_details,
     has_calendar_conflict,
@@ -19,6 +26,365 @@ from app.services.email_sender import send_email, EmailSendError
 from app.config import settings
 
 
+def _event_sort_key(event: Dict[str, Any]) -> tuple[str, str]:
+    return (event.get('date') or '', event.get('time') or '')
+
+
+# dateutil is only needed when the strptime fast path fails; imported on first use
+_date_parser = None
+
+
+def _get_date_parser():
+    global _date_parser
+    if _date_parser is None:
+        from dateutil import parser as date_parser
+        _date_parser = date_parser
+    return _date_parser
+
+
+# Formats tried with strptime before falling back to dateutil's fuzzy parser
+_FAST_DATE_FORMATS = ('%m/%d/%Y', '%m-%d-%Y', '%B %d %Y', '%b %d %Y', '%d %B %Y', '%d %b %Y')
+_FAST_DATE_FORMATS_NO_YEAR = ('%m/%d', '%m-%d', '%B %d', '%b %d', '%d %B', '%d %b')
+_FAST_TIME_FORMATS = ('%I:%M%p', '%I%p', '%H:%M')
+_ORDINAL_SUFFIX = re.compile(r"(?<=\d)(?:st|nd|rd|th)\b", re.IGNORECASE)
+
+# Extraction patterns and vocabularies, compiled once at import
+_EMAIL_PATTERN = r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}"
+_ATTENDEE_NAME_PATTERN = r"[A-Za-z][A-Za-z'\-\.]+(?:\s+[A-Za-z][A-Za-z'\-\.]+){0,3}"
+# Non-capturing; each name is factored so its long form is tried before the abbreviation
+_MONTH_PATTERN = r"(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|sept(?:ember)?|sep|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)"
+
+_EMAIL_RE = re.compile(_EMAIL_PATTERN)
+_LABELED_NAME_RE = re.compile(r"(?:attendee name|name)\s*[:\-]\s*([^,;\n]+)", re.IGNORECASE)
+_NAME_PHRASE_RE = re.compile(r"(?:his name is|her name is|their name is|name is)\s+([^,.;\n]+)", re.IGNORECASE)
+_TITLED_NAME_RE = re.compile(r"\b(Mr|Ms|Mrs|Dr|Prof)\.?\s+([A-Z][A-Za-z'-]+(?:\s+[A-Z][A-Za-z'-]+){0,3})")
+_NAMED_MATCH_RE = re.compile(r"(?:name is|attendee name is|attendee is)\s+([^,.;]+)", re.IGNORECASE)
+_CLAUSE_SPLIT_RE = re.compile(r"[.\n,;]")
+_SIMPLE_NAME_RE = re.compile(r"^[A-Za-z][A-Za-z'\-\.]*(?:\s+[A-Za-z][A-Za-z'\-\.]*){0,3}$")
+_DIGIT_RE = re.compile(r"\d")
+# Factored by prefix, longest suffix first, so each day name is tried once
+_WEEKDAY_RE = re.compile(
+    r"\b(next\s+)?(mon(?:day)?|tue(?:sday|s)?|wed(?:nesday)?|thu(?:rsday|rs|r)?|fri(?:day)?|sat(?:urday)?|sun(?:day)?)\b"
+)
+_DATE_RES = (
+    re.compile(rf"\b{_MONTH_PATTERN}\s+\d{{1,2}}(?:st|nd|rd|th)?(?:,)?(?:\s+\d{{4}})?\b", re.IGNORECASE),
+    re.compile(rf"\b\d{{1,2}}(?:st|nd|rd|th)?\s+{_MONTH_PATTERN}(?:\s+\d{{4}})?\b", re.IGNORECASE),
+    re.compile(r"\b\d{1,2}[/-]\d{1,2}(?:[/-]\d{2,4})?\b"),
+)
+_TIME_RES = (
+    re.compile(r"\b\d{1,2}(:\d{2})?\s*(am|pm)\b", re.IGNORECASE),
+    re.compile(r"\b\d{1,2}:\d{2}\b", re.IGNORECASE),
+)
+_NOON_RE = re.compile(r"\b(noon|midnight)\b")
+_LABELED_TITLE_RE = re.compile(r"(?:meeting title|title|subject)\s*[:\-]\s*([^,;\n]+)", re.IGNORECASE)
+_NOTES_RE = re.compile(r"(?:about|regarding)\s+(.+)$", re.IGNORECASE)
+_CONFIRM_RE = re.compile(
+    r"\b(confirm|confirmed|yes|yep|yeah|sure|ok|okay|approve|go ahead|sounds good|book it|do it|please do)\b",
+    re.IGNORECASE
+)
+# Substrings one of which must appear before _CONFIRM_RE can match
+_CONFIRM_TOKENS = ("confirm", "yes", "yep", "yeah", "sure", "ok", "approve", "go ahead", "sounds good", "book it", "do it", "please do")
+_PAIR_RES = (
+    re.compile(rf"({_ATTENDEE_NAME_PATTERN})\s*<\s*({_EMAIL_PATTERN})\s*>", re.IGNORECASE),
+    re.compile(rf"({_ATTENDEE_NAME_PATTERN})\s*\(\s*({_EMAIL_PATTERN})\s*\)", re.IGNORECASE),
+    re.compile(rf"({_ATTENDEE_NAME_PATTERN})\s*[:\-]\s*({_EMAIL_PATTERN})", re.IGNORECASE),
+)
+_EMAIL_PHRASE_RE = re.compile(rf"(?:email(?:id)? is|email(?: address)? is)\s*({_EMAIL_PATTERN})", re.IGNORECASE)
+_NAME_LIST_RE = re.compile(r"(?:with|invite|inviting|attendees?)\s+([^.;]+)", re.IGNORECASE)
+_NAME_LIST_STOP_RE = re.compile(r"\b(?:on|at|for|about|regarding)\b", re.IGNORECASE)
+_NAME_LIST_SPLIT_RE = re.compile(r",| and ")
+# One to four capitalized words that are not a group term ("Team", "Parents", ...)
+_LIST_NAME_RE = re.compile(
+    r"(?!.*\b(?i:friend|parents|team|colleagues)\b)[A-Z][A-Za-z'\-\.]*(?:\s+[A-Z][A-Za-z'\-\.]*){0,3}",
+    re.DOTALL
+)
+
+# Shared by the confirmation prompt and the invite email
+_WHEN_LINE = "When: {} {} ({})".format
+
+_NON_NAME_TERMS = frozenset({
+    "am",
+    "meeting",
+    "sync",
+    "kickoff",
+    "review",
+    "standup",
+    "retro",
+    "planning",
+    "pm",
+    "demo",
+    "update",
+    "check-in",
+    "checkin",
+    "status",
+})
+_NAME_STOPWORDS = frozenset({
+    "invite",
+    "inviting",
+    "schedule",
+    "scheduling",
+    "meeting",
+    "meet",
+    "with",
+    "for",
+    "book",
+    "booking",
+    "set",
+    "setup",
+    "set-up",
+    "call",
+})
+_SCHEDULE_KEYWORDS = ("schedule", "book", "meeting", "appointment", "calendar", "invite")
+_WEEKDAY_MAP = MappingProxyType({
+    "mon": 0,
+    "monday": 0,
+    "tue": 1,
+    "tues": 1,
+    "tuesday": 1,
+    "wed": 2,
+    "wednesday": 2,
+    "thu": 3,
+    "thur": 3,
+    "thurs": 3,
+    "thursday": 3,
+    "fri": 4,
+    "friday": 4,
+    "sat": 5,
+    "saturday": 5,
+    "sun": 6,
+    "sunday": 6,
+})
+
+
+@functools.lru_cache(maxsize=1024)
+def _parse_date_token(raw: str, year: int) -> Optional[str]:
+    """Parse a matched date phrase to YYYY-MM-DD, defaulting to ``year``."""
+    normalized = " ".join(_ORDINAL_SUFFIX.sub("", raw).replace(",", " ").split())
+    for fmt in _FAST_DATE_FORMATS:
+        try:
+            return datetime.strptime(normalized, fmt).strftime("%Y-%m-%d")
+        except ValueError:
+            pass
+    for fmt in _FAST_DATE_FORMATS_NO_YEAR:
+        try:
+            # Parse with the year attached so Feb 29 is checked against the right year
+            return datetime.strptime(f"{year} {normalized}", f"%Y {fmt}").strftime("%Y-%m-%d")
+        except ValueError:
+            pass
+    try:
+        return _get_date_parser().parse(raw, fuzzy=True, default=datetime(year, 1, 1)).strftime("%Y-%m-%d")
+    except (ValueError, TypeError, OverflowError):
+        return None
+
+
+@functools.lru_cache(maxsize=1024)
+def _parse_time_token(raw: str) -> Optional[str]:
+    """Parse a matched time phrase to HH:MM (24-hour)."""
+    normalized = raw.upper().replace(" ", "")
+    if normalized == "NOON":
+        return "12:00"
+    if normalized == "MIDNIGHT":
+        return "00:00"
+    for fmt in _FAST_TIME_FORMATS:
+        try:
+            return datetime.strptime(normalized, fmt).strftime("%H:%M")
+        except ValueError:
+            pass
+    try:
+        # Minutes missing from the phrase default to :00, not the current minute
+        return _get_date_parser().parse(raw, fuzzy=True, default=datetime(2000, 1, 1)).strftime("%H:%M")
+    except (ValueError, TypeError, OverflowError):
+        return None
+
+
+def _is_confirmation_text(text: str) -> bool:
+    if not text:
+        return False
+    lowered = text.lower()
+    if not any(token in lowered for token in _CONFIRM_TOKENS):
+        return False
+    return bool(_CONFIRM_RE.search(text))
+
+
+# The extractors below are pure functions of the message text. Users repeat the
+# same phrases across confirmation turns, so their results are memoized.
+@functools.lru_cache(maxsize=2048)
+def _find_emails(text: str) -> Tuple[str, ...]:
+    if not text:
+        return ()
+    return tuple(_EMAIL_RE.findall(text))
+
+
+@functools.lru_cache(maxsize=2048)
+def _find_attendee_name(text: str) -> Optional[str]:
+    if not text:
+        return None
+    # Cheap substring checks decide which of the labeled/titled patterns can match at all
+    lowered = text.lower()
+    has_label = "name" in lowered or "attendee" in lowered
+    if has_label:
+        labeled_match = _LABELED_NAME_RE.search(text)
+        if labeled_match:
+            return labeled_match.group(1).strip()
+        phrase_match = _NAME_PHRASE_RE.search(text)
+        if phrase_match:
+            return phrase_match.group(1).strip()
+    if lowered != text:
+        titled_match = _TITLED_NAME_RE.search(text)
+        if titled_match:
+            return f"{titled_match.group(1)} {titled_match.group(2)}".strip()
+    if has_label:
+        named_match = _NAMED_MATCH_RE.search(text)
+        if named_match:
+            return named_match.group(1).strip()
+    emails = _find_emails(text)
+    email = emails[0] if emails else None
+    if email:
+        before_email = text.split(email)[0]
+        clause = _CLAUSE_SPLIT_RE.split(before_email)[-1].strip()
+        if clause:
+            words = clause.split()
+            while words and words[0].lower() in _NAME_STOPWORDS:
+                words = words[1:]
+            candidate = " ".join(words[-4:]).strip()
+            if (
+                candidate
+                and len(candidate.split()) <= 4
+                and not any(term in candidate.lower() for term in _NON_NAME_TERMS)
+                and _SIMPLE_NAME_RE.match(candidate)
+            ):
+                return candidate
+    stripped = text.strip()
+    if (
+        stripped
+        and not email
+        and not _is_confirmation_text(stripped)
+        and not _DIGIT_RE.search(stripped)
+    ):
+        simple_name_match = _SIMPLE_NAME_RE.match(stripped)
+        if simple_name_match and not any(term in stripped.lower() for term in _NON_NAME_TERMS):
+            return stripped
+    return None
+
+
+@functools.lru_cache(maxsize=2048)
+def _scan_datetime(text: str) -> Tuple[Optional[Tuple[str, int]], Optional[str], Optional[str]]:
+    """Clock-independent part of datetime extraction.
+
+    Returns ``(relative, date_phrase, time_phrase)`` where ``relative`` is
+    ``("days", offset)``, ``("weekday", day)`` or ``("next_weekday", day)``;
+    resolving it against the current date is left to the caller.
+    """
+    lowered = text.lower()
+    relative = None
+    if "day after tomorrow" in lowered:
+        relative = ("days", 2)
+    elif "tomorrow" in lowered:
+        relative = ("days", 1)
+    elif "today" in lowered:
+        relative = ("days", 0)
+    else:
+        weekday_match = _WEEKDAY_RE.search(lowered)
+        if weekday_match:
+            kind = "next_weekday" if weekday_match.group(1) else "weekday"
+            relative = (kind, _WEEKDAY_MAP[weekday_match.group(2)])
+    date_match = None
+    for pattern in _DATE_RES:
+        match = pattern.search(text)
+        if match:
+            date_match = match.group(0)
+            break
+    time_match = None
+    for pattern in _TIME_RES:
+        match = pattern.search(text)
+        if match:
+            time_match = match.group(0)
+            break
+    if not time_match:
+        noon_match = _NOON_RE.search(lowered)
+        if noon_match:
+            time_match = noon_match.group(0)
+    return relative, date_match, time_match
+
+
+@functools.lru_cache(maxsize=64)
+def _missing_fields_message(missing: Tuple[str, ...]) -> str:
+    # Only a handful of field combinations occur, so the reply text is reused
+    return f"Please provide the {', '.join(missing)}."
+
+
+@functools.lru_cache(maxsize=4)
+def _get_timezone(name: str) -> ZoneInfo:
+    """ZoneInfo for the configured calendar timezone (the setting is fixed at runtime)."""
+    return ZoneInfo(name)
+
+
+def _normalize_attendee_name(name: Optional[str]) -> Optional[str]:
+    if not name:
+        return None
+    tokens = name.split()
+    if tokens and tokens[0].lower() in {"am", "pm"}:
+        tokens = tokens[1:]
+    return " ".join(tokens) or None
+
+
+def _canonical_attendee(attendee: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of an attendee with the name stripped and the email stripped and lowercased."""
+    canonical = dict(attendee)
+    canonical["name"] = (attendee.get("name") or "").strip() or None
+    canonical["email"] = (attendee.get("email") or "").strip().lower() or None
+    return canonical
+
+
+# The same attendees are rendered for the confirmation prompt and again for the invite body
+@functools.lru_cache(maxsize=1024)
+def _render_attendee(name: str, email: str) -> str:
+    name = name.strip()
+    email = email.strip()
+    if name and email:
+        return f"{_normalize_attendee_name(name) or name} <{email}>"
+    if email:
+        return email
+    if name:
+        return _normalize_attendee_name(name) or name
+    return ""
+
+
+# The prompt only needs minute precision, so the formatted block is reused briefly
+_TIME_CONTEXT_TTL_SECONDS = 30.0
+_time_context_cache: Tuple[float, str] = (0.0, "")
+
+
+def _get_time_context() -> str:
+    """Current date, time and timezone lines for the LLM prompt."""
+    global _time_context_cache
+    cached_at, time_context = _time_context_cache
+    current = monotonic()
+    if time_context and current - cached_at < _TIME_CONTEXT_TTL_SECONDS:
+        return time_context
+
+    timezone = settings.GOOGLE_CALENDAR_TIMEZONE
+    try:
+        now = datetime.now(_get_timezone(timezone))
+    except Exception:
+        now, timezone = datetime.now(), "Local"
+    time_context = (
+        f"Current Date: {now.strftime('%A, %B %d, %Y')}\n"
+        f"Current Time: {now.strftime('%I:%M %p')}\n"
+        f"Timezone: {timezone}"
+    )
+    _time_context_cache = (current, time_context)
+    return time_context
+
+
+@dataclass
+class _PendingEventWrite:
+    """Pending-event state buffered for one turn and persisted once."""
+    details: Optional[Dict[str, Any]]
+    clear: bool = False
+    stored: Optional[Dict[str, Any]] = None
+
+
 class CalendarAgent(BaseAgent):
     """
     Calendar Agent - Executive Schedule Management.
@@ -73,6 +439,29 @@ If the user asks to book an event:
 - Once required fields are present, ask the user to confirm.
 - Only create the calendar event after the user confirms."""
 
+    _LOW_SIGNAL_ACTIONS = frozenset({'check_availability'})
+
+    HISTORY_CACHE_SIZE = 1024
+
+    # "Meet Tuesday at 3" and "meet Thursday at 3" embed almost identically
+    SEMANTIC_CACHE_MATCHING = False
+
+    _USER_TMPL = """
+{context}
+{memory_context}
+
+Time Context:
+
+{time_context}
+
+
+User's Calendar Request: {task}
+
+Analyze this request and provide your response in the specified JSON format.
+If this is a scheduling request without a specific attendee email, meeting title, date, or time, ask the user for the missing details.
+Only ask for attendee names when a name is provided without an email.
+"""
+
     def __init__(self):
         super().__init__(
             name="calendar",
@@ -90,12 +479,18 @@ If the user asks to book an event:
         )
 
         # Simulated calendar data (in production, integrate with Google Calendar, Outlook, etc.)
-        self.calendar_events = []
+        # Kept sorted by (date, time) so range lookups are a bisect, not a scan.
+        self.calendar_events: list[Dict[str, Any]] = []
+        self._event_ids = count(1)
+
+        # conversation_id -> (schedule request index, its content, messages consumed, details)
+        self._history_details_cache: "OrderedDict[str, Tuple[Optional[str], Optional[int], Optional[str], int, Dict[str, Any]]]" = OrderedDict()
 
     async def process(self, state: AgentState) -> AgentResponse:
         """Process calendar-related requests."""
         conversation_id = state.get('conversation_id')
-        if not conversation_id:
+        # Malformed ids are rejected here rather than after a pool checkout
+        if not self._is_valid_conversation_id(conversation_id):
             return AgentResponse(
                 agent_name=self.name,
                 status='needs_clarification',
@@ -103,224 +498,123 @@ If the user asks to book an event:
                 clarification_question='Which conversation should I use to create the event?'
             )
 
-        pending = self._get_pending_event(conversation_id)
-        task_text = state.get('task', '')
-        email = self._extract_email(task_text)
-        schedule_intent = self._is_schedule_request(task_text)
-        history_details = self._extract_details_from_history(state.get('messages', []))
-        has_history = bool(history_details)
-
-        if pending or schedule_intent or has_history:
-            details = pending.copy() if pending else {}
-            details = self._merge_missing_details(details, history_details)
-            prev_date = details.get("date")
-            prev_time = details.get("time")
-            prev_duration = int(details.get("duration_minutes") or 60)
-            details = self._apply_extracted_fields(details, task_text, overwrite=True)
-            if self._time_fields_changed(details, prev_date, prev_time, prev_duration):
-                details.pop("availability_checked", None)
-                details.pop("confirmation_snapshot", None)
-            if email:
-                details["attendee_email"] = email
-                details["attendee_email_source"] = "user"
-
-            attendees = details.get("attendees", [])
-            if details.get("attendee_name") or details.get("attendee_email"):
-                attendees = self._merge_attendees(attendees, [{
-                    "name": details.get("attendee_name"),
-                    "email": details.get("attendee_email"),
-                }])
-            details["attendees"] = attendees
-            if len(attendees) == 1:
-                details["attendee_name"] = attendees[0].get("name")
-                details["attendee_email"] = attendees[0].get("email")
-                if details.get("attendee_email"):
+        # One clock read per request, threaded through the parsing helpers; relative
+        # dates resolve against the same calendar-timezone "today" the prompt shows
+        try:
+            current = datetime.now(_get_timezone(settings.GOOGLE_CALENDAR_TIMEZONE))
+        except Exception:
+            current = datetime.now().astimezone()
+        checked_at = current.timestamp()
+        now = current.replace(tzinfo=None)
+
+        # The pending event is read once and written back once, when the turn is done
+        with self._pending_event_txn(conversation_id) as txn:
+            pending = txn.stored
+            task_text = state.get('task', '')
+            email = self._extract_email(task_text)
+            schedule_intent = self._is_schedule_request(task_text)
+            history_details = self._extract_details_from_history(
+                state.get('messages', []),
+                now=now,
+                conversation_id=conversation_id
+            )
+            has_history = bool(history_details)
+
+            if pending or schedule_intent or has_history:
+                details = self._merge_missing_details(pending or {}, history_details)
+                prev_key = self._availability_key(details)
+                details = self._apply_extracted_fields(details, task_text, overwrite=True, now=now, _inplace=True)
+                if self._availability_key(details) != prev_key:
+                    details.pop("availability_checked", None)
+                    details.pop("confirmation_snapshot", None)
+                if email:
+                    details["attendee_email"] = email
                     details["attendee_email_source"] = "user"
 
-            self._set_pending_event(conversation_id, details)
-
-            missing = self._missing_required_fields(details)
+                attendees = details.get("attendees", [])
+                if details.get("attendee_name") or details.get("attendee_email"):
+                    attendees = self._merge_attendees(attendees, [{
+                        "name": details.get("attendee_name"),
+                        "email": details.get("attendee_email"),
+                    }])
+                details["attendees"] = attendees
+                if len(attendees) == 1:
+                    details["attendee_name"] = attendees[0].get("name")
+                    details["attendee_email"] = attendees[0].get("email")
+                    if details.get("attendee_email"):
+                        details["attendee_email_source"] = "user"
+
+                txn.details = details
+
+                missing = self._missing_required_fields(details)
+
+                if self._is_confirmation(task_text):
+                    if missing:
+                        return self._missing_fields_response(missing)
+                    blocked = await self._ensure_availability_checked(details, checked_at)
+                    if blocked:
+                        return blocked
+                    response = await self._send_pending_event(details)
+                    txn.clear = response.status == 'success'
+                    return response
 
-            if self._is_confirmation(task_text):
                 if missing:
-                    return AgentResponse(
-                        agent_name=self.name,
-                        status='needs_clarification',
-                        message=f"Please provide the {', '.join(missing)}.",
-                        clarification_question="What details should I use?"
-                    )
-                availability = details.get("availability_checked")
-                if availability and availability.get("status") == "conflict":
-                    return AgentResponse(
-                        agent_name=self.name,
-                        status='needs_clarification',
-                        message="That time conflicts with an existing event. Please choose another date or time.",
-                        clarification_question="What date and time should I book instead?"
-                    )
-                if not availability:
-                    try:
-                        start_dt, end_dt = self._build_event_times(details)
-                        if has_calendar_conflict(
-                            start_dt.isoformat(),
-                            end_dt.isoformat(),
-                            settings.GOOGLE_CALENDAR_TIMEZONE
-                        ):
-                            details["availability_checked"] = {
-                                "date": details.get("date"),
-                                "time": details.get("time"),
-                                "duration_minutes": int(details.get("duration_minutes") or 60),
-                                "status": "conflict",
-                                "checked_at": datetime.utcnow().isoformat(),
-                            }
-                            self._set_pending_event(conversation_id, details)
-                            return AgentResponse(
-                                agent_name=self.name,
-                                status='needs_clarification',
-                                message="That time conflicts with an existing event. Please choose another date or time.",
-                                clarification_question="What date and time should I book instead?"
-                            )
-                        details["availability_checked"] = {
-                            "date": details.get("date"),
-                            "time": details.get("time"),
-                            "duration_minutes": int(details.get("duration_minutes") or 60),
-                            "status": "clear",
-                            "checked_at": datetime.utcnow().isoformat(),
-                        }
-                        self._set_pending_event(conversation_id, details)
-                    except CalendarSendError as exc:
-                        return AgentResponse(
-                            agent_name=self.name,
-                            status='error',
-                            message=f"I couldn't check calendar availability: {exc}",
-                            data={'action': 'schedule', 'error': str(exc)}
-                        )
-                    except ValueError:
-                        pass
-                return self._send_pending_event(conversation_id, details)
-
-            if missing:
-                return AgentResponse(
-                    agent_name=self.name,
-                    status='needs_clarification',
-                    message=f"Please provide the {', '.join(missing)}.",
-                    clarification_question="What details should I use?"
-                )
+                    return self._missing_fields_response(missing)
+
+                blocked = await self._ensure_availability_checked(details, checked_at, ttl_minutes=5)
+                if blocked:
+                    return blocked
 
-            try:
-                start_dt, end_dt = self._build_event_times(details)
-                if self._availability_check_is_fresh(details):
-                    return AgentResponse(
-                        agent_name=self.name,
-                        status='needs_clarification',
-                        message=self._build_confirmation_message(details),
-                        clarification_question='Confirm booking?'
-                    )
-                if has_calendar_conflict(start_dt.isoformat(), end_dt.isoformat(), settings.GOOGLE_CALENDAR_TIMEZONE):
-                    details["availability_checked"] = {
-                        "date": details.get("date"),
-                        "time": details.get("time"),
-                        "duration_minutes": int(details.get("duration_minutes") or 60),
-                        "status": "conflict",
-                        "checked_at": datetime.utcnow().isoformat(),
-                    }
-                    details.pop("confirmation_snapshot", None)
-                    self._set_pending_event(conversation_id, details)
-                    return AgentResponse(
-                        agent_name=self.name,
-                        status='needs_clarification',
-                        message="That time conflicts with an existing event. Please choose another date or time.",
-                        clarification_question="What date and time should I book instead?"
-                    )
-                details["availability_checked"] = {
-                    "date": details.get("date"),
-                    "time": details.get("time"),
-                    "duration_minutes": int(details.get("duration_minutes") or 60),
-                    "status": "clear",
-                    "checked_at": datetime.utcnow().isoformat(),
-                }
-                details["confirmation_snapshot"] = {
-                    "date": details.get("date"),
-                    "time": details.get("time"),
-                    "duration_minutes": int(details.get("duration_minutes") or 60),
-                    "status": "clear",
-                    "checked_at": datetime.utcnow().isoformat(),
-                }
-                self._set_pending_event(conversation_id, details)
-            except CalendarSendError as exc:
                 return AgentResponse(
                     agent_name=self.name,
-                    status='error',
-                    message=f"I couldn't check calendar availability: {exc}",
-                    data={'action': 'schedule', 'error': str(exc)}
+                    status='needs_clarification',
+                    message=self._build_confirmation_message(details),
+                    clarification_question='Confirm booking?'
                 )
-            except ValueError:
-                pass
 
-            return AgentResponse(
-                agent_name=self.name,
-                status='needs_clarification',
-                message=self._build_confirmation_message(details),
-                clarification_question='Confirm booking?'
-            )
+        # Retrieve relevant calendar memories while the prompt context is built
+        memories_task = asyncio.create_task(
+            self.retrieve_memories(state['task'], limit=3, memory_type='episodic')
+        )
 
         context = self._build_context(state)
 
-        # Retrieve relevant calendar memories
-        memories = await self.retrieve_memories(state['task'], limit=3, memory_type='episodic')
+        memories = await memories_task
         memory_context = ""
         if memories:
             memory_context = "\n\nPrevious Calendar Context:\n" + "\n".join([
                 f"- {m['content']}" for m in memories
             ])
 
-        # Get current date/time context
-        now = datetime.now()
-        time_context = f"""
-Current Date: {now.strftime('%A, %B %d, %Y')}
-Current Time: {now.strftime('%I:%M %p')}
-Timezone: Local
-"""
-
         messages = [
-            SystemMessage(content=self.system_prompt),
-            HumanMessage(content=f"""
-{context}
-{memory_context}
-
-Time Context:
-{time_context}
-
-User's Calendar Request: {state['task']}
-
-Analyze this request and provide your response in the specified JSON format.
-If this is a scheduling request without a specific attendee email, meeting title, date, or time, ask the user for the missing details.
-Only ask for attendee names when a name is provided without an email.
-""")
+            self._system_msg,
+            HumanMessage(content=self._USER_TMPL.format_map({
+                'context': context,
+                'memory_context': memory_context,
+                'time_context': _get_time_context(),
+                'task': state['task']
+            }))
         ]
 
-        response_text = await self._call_llm(messages)
+        response_text = await self._call_llm(messages, json_mode=True)
 
         # Parse response
-        try:
-            json_start = response_text.find('{')
-            json_end = response_text.rfind('}') + 1
-            if json_start != -1 and json_end > json_start:
-                result = json.loads(response_text[json_start:json_end])
-            else:
-                result = self._create_default_response(state['task'])
-        except json.JSONDecodeError:
+        result = self._parse_json_response(response_text)
+        if result is None:
             result = self._create_default_response(state['task'])
 
-        # Store interaction in memory
-        await self.store_memory(
-            content=f"Calendar action: {result.get('action', 'unknown')} - {state['task']}",
-            memory_type='episodic',
-            conversation_id=state.get('conversation_id'),
-            importance=0.6
-        )
-
         action = result.get('action', '')
 
+        # Store interaction in memory (lookups like availability checks aren't worth recalling)
+        memory_content = f"Calendar action: {action or 'unknown'} - {state['task']}"
+        if action not in self._LOW_SIGNAL_ACTIONS and self._should_store(memory_content, 0.6, task=state['task']):
+            self.store_memory_in_background(
+                content=memory_content,
+                memory_type='episodic',
+                conversation_id=state.get('conversation_id'),
+                importance=0.6
+            )
+
         user_response = result.get('response_to_user', 'Calendar request processed.')
         needs_clarification = False
         clarification_question = None
@@ -331,7 +625,7 @@ Only ask for attendee names when a name is provided without an email.
             agent_name=self.name,
             status='needs_clarification' if needs_clarification else 'success',
             message=user_response,
-            thoughts=[f"Action: {action}", f"Details: {json.dumps(result.get('details', {}))}"],
+            thoughts=[f"Action: {action}", f"Details: {orjson.dumps(result.get('details', {})).decode()}"],
             tool_calls=[{'tool': 'calendar_api', 'action': action, 'params': result.get('details', {})}],
             data=result,
             clarification_question=clarification_question
@@ -349,243 +643,105 @@ Only ask for attendee names when a name is provided without an email.
             'response_to_user': "Please share the meeting title, date, time, and attendee email."
         }
 
-    def _simulate_schedule(self, details: Dict[str, Any]):
+    def _simulate_schedule(self, details: Dict[str, Any], now: Optional[datetime] = None):
         """Simulate scheduling an event."""
         event = {
-            'id': len(self.calendar_events) + 1,
+            'id': next(self._event_ids),
             'title': details.get('title', 'Untitled'),
             'date': details.get('date'),
             'time': details.get('time'),
             'duration': details.get('duration_minutes', 60),
             'attendee_name': details.get('attendee_name'),
             'attendee_email': details.get('attendee_email'),
-            'created_at': datetime.now().isoformat()
+            'created_at': (now or datetime.now()).isoformat()
         }
-        self.calendar_events.append(event)
+        insort(self.calendar_events, event, key=_event_sort_key)
         return event
 
+    def _find_conflicts(self, start: tuple[str, str], end: tuple[str, str]) -> list[Dict[str, Any]]:
+        """Return simulated events starting in [start, end), keyed by (date, time)."""
+        lo = bisect_left(self.calendar_events, start, key=_event_sort_key)
+        hi = bisect_left(self.calendar_events, end, key=_event_sort_key)
+        return self.calendar_events[lo:hi]
+
     def _extract_email(self, text: str) -> Optional[str]:
-        emails = self._extract_emails(text)
+        emails = _find_emails(text)
         return emails[0] if emails else None
 
-    def _extract_emails(self, text: str) -> list[str]:
-        if not text:
-            return []
-        return re.findall(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}", text)
+    def _extract_emails(self, text: str) -> Tuple[str, ...]:
+        return _find_emails(text)
 
     def _extract_attendee_name(self, text: str) -> Optional[str]:
-        if not text:
-            return None
-        non_name_terms = {
-            "am",
-            "meeting",
-            "sync",
-            "kickoff",
-            "review",
-            "standup",
-            "retro",
-            "planning",
-            "pm",
-            "demo",
-            "update",
-            "check-in",
-            "checkin",
-            "status",
-        }
-        labeled_match = re.search(
-            r"(?:attendee name|name)\s*[:\-]\s*([^,;\n]+)",
-            text,
-            flags=re.IGNORECASE
-        )
-        if labeled_match:
-            return labeled_match.group(1).strip()
-        phrase_match = re.search(
-            r"(?:his name is|her name is|their name is|name is)\s+([^,.;\n]+)",
-            text,
-            flags=re.IGNORECASE
-        )
-        if phrase_match:
-            return phrase_match.group(1).strip()
-        titled_match = re.search(
-            r"\b(Mr|Ms|Mrs|Dr|Prof)\.?\s+([A-Z][A-Za-z'-]+(?:\s+[A-Z][A-Za-z'-]+){0,3})",
-            text
-        )
-        if titled_match:
-            return f"{titled_match.group(1)} {titled_match.group(2)}".strip()
-        named_match = re.search(
-            r"(?:name is|attendee name is|attendee is)\s+([^,.;]+)",
-            text,
-            flags=re.IGNORECASE
-        )
-        if named_match:
-            return named_match.group(1).strip()
-        email = self._extract_email(text)
-        if email:
-            before_email = text.split(email)[0]
-            clause = re.split(r"[.\n,;]", before_email)[-1].strip()
-            if clause:
-                words = clause.split()
-                stopwords = {
-                    "invite",
-                    "inviting",
-                    "schedule",
-                    "scheduling",
-                    "meeting",
-                    "meet",
-                    "with",
-                    "for",
-                    "book",
-                    "booking",
-                    "set",
-                    "setup",
-                    "set-up",
-                    "call",
-                }
-                while words and words[0].lower() in stopwords:
-                    words = words[1:]
-                candidate = " ".join(words[-4:]).strip()
-                if (
-                    candidate
-                    and len(candidate.split()) <= 4
-                    and not any(term in candidate.lower() for term in non_name_terms)
-                    and re.match(r"^[A-Za-z][A-Za-z'\-\.]*(?:\s+[A-Za-z][A-Za-z'\-\.]*){0,3}$", candidate)
-                ):
-                    return candidate
-        stripped = text.strip()
-        if (
-            stripped
-            and not self._extract_email(stripped)
-            and not self._is_confirmation(stripped)
-            and not re.search(r"\d", stripped)
-        ):
-            simple_name_match = re.match(r"^[A-Za-z][A-Za-z'\-\.]*(?:\s+[A-Za-z][A-Za-z'\-\.]*){0,3}$", stripped)
-            if simple_name_match and not any(term in stripped.lower() for term in non_name_terms):
-                return stripped
-        return None
+        return _find_attendee_name(text)
 
-    def _extract_datetime(self, text: str) -> Optional[Dict[str, str]]:
+    def _extract_datetime(self, text: str, now: Optional[datetime] = None) -> Optional[Dict[str, str]]:
         if not text:
             return None
-        lowered = text.lower()
-        now = datetime.now()
-        month = r"(jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|jun(?:e)?|jul(?:y)?|aug(?:ust)?|sep(?:tember)?|sept|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)"
-        date_patterns = [
-            rf"\b{month}\s+\d{{1,2}}(?:st|nd|rd|th)?(?:,)?(?:\s+\d{{4}})?\b",
-            rf"\b\d{{1,2}}(?:st|nd|rd|th)?\s+{month}(?:\s+\d{{4}})?\b",
-            r"\b\d{1,2}[/-]\d{1,2}([/-]\d{2,4})?\b",
-        ]
-        time_patterns = [
-            r"\b\d{1,2}(:\d{2})?\s*(am|pm)\b",
-            r"\b\d{1,2}:\d{2}\b",
-        ]
+        relative, date_match, time_match = _scan_datetime(text)
+        now = now or datetime.now()
         relative_date = None
-        if "day after tomorrow" in lowered:
-            relative_date = (now + timedelta(days=2)).date()
-        elif "tomorrow" in lowered:
-            relative_date = (now + timedelta(days=1)).date()
-        elif "today" in lowered:
-            relative_date = now.date()
-        else:
-            weekday_match = re.search(
-                r"\b(next\s+)?(mon|monday|tue|tues|tuesday|wed|wednesday|thu|thur|thurs|thursday|fri|friday|sat|saturday|sun|sunday)\b",
-                lowered
-            )
-            if weekday_match:
-                weekday_map = {
-                    "mon": 0,
-                    "monday": 0,
-                    "tue": 1,
-                    "tues": 1,
-                    "tuesday": 1,
-                    "wed": 2,
-                    "wednesday": 2,
-                    "thu": 3,
-                    "thur": 3,
-                    "thurs": 3,
-                    "thursday": 3,
-                    "fri": 4,
-                    "friday": 4,
-                    "sat": 5,
-                    "saturday": 5,
-                    "sun": 6,
-                    "sunday": 6,
-                }
-                target_day = weekday_map[weekday_match.group(2)]
-                days_ahead = (target_day - now.weekday()) % 7
-                if days_ahead == 0 and weekday_match.group(1):
+        if relative:
+            kind, value = relative
+            if kind == "days":
+                days_ahead = value
+            else:
+                days_ahead = (value - now.weekday()) % 7
+                if days_ahead == 0 and kind == "next_weekday":
                     days_ahead = 7
-                relative_date = (now + timedelta(days=days_ahead)).date()
-        date_match = None
-        for pattern in date_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                date_match = match.group(0)
-                break
-        time_match = None
-        for pattern in time_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                time_match = match.group(0)
-                break
-        if not time_match:
-            noon_match = re.search(r"\b(noon|midnight)\b", lowered)
-            if noon_match:
-                time_match = noon_match.group(0)
+            relative_date = (now + timedelta(days=days_ahead)).date()
         if not date_match and not time_match and not relative_date:
             return None
         result = {}
         if date_match:
-            try:
-                parsed_date = date_parser.parse(date_match, fuzzy=True, default=now)
-                result["date"] = parsed_date.strftime("%Y-%m-%d")
-            except (ValueError, TypeError):
+            parsed_date = _parse_date_token(date_match, now.year)
+            if parsed_date is None:
                 return None
+            result["date"] = parsed_date
         elif relative_date:
             result["date"] = relative_date.strftime("%Y-%m-%d")
         if time_match:
-            try:
-                if time_match.lower() == "noon":
-                    result["time"] = "12:00"
-                elif time_match.lower() == "midnight":
-                    result["time"] = "00:00"
-                else:
-                    parsed_time = date_parser.parse(time_match, fuzzy=True, default=now)
-                    result["time"] = parsed_time.strftime("%H:%M")
-            except (ValueError, TypeError):
+            parsed_time = _parse_time_token(time_match)
+            if parsed_time is None:
                 return None
+            result["time"] = parsed_time
         return result
 
-    def _apply_extracted_fields(self, details: Dict[str, Any], text: str, overwrite: bool = False) -> Dict[str, Any]:
-        updated = details.copy()
-        attendees = updated.get("attendees", [])
-        extracted_attendees = self._extract_attendees(text)
+    def _apply_extracted_fields(
+        self,
+        details: Dict[str, Any],
+        text: str,
+        overwrite: bool = False,
+        now: Optional[datetime] = None,
+        _inplace: bool = False
+    ) -> Dict[str, Any]:
+        # Callers that own ``details`` pass _inplace to skip the defensive copy
+        updated = details if _inplace else details.copy()
+        # Run each extractor over the text once; the attendee pass reuses the results
+        emails = self._extract_emails(text)
+        email = emails[0] if emails else None
+        name = self._extract_attendee_name(text)
+
+        extracted_attendees = self._extract_attendees(text, emails, name)
         if extracted_attendees:
-            attendees = self._merge_attendees(attendees, extracted_attendees)
-            updated["attendees"] = attendees
+            updated["attendees"] = self._merge_attendees(updated.get("attendees", []), extracted_attendees)
 
-        email = self._extract_email(text)
         if email and (overwrite or not updated.get("attendee_email")):
             updated["attendee_email"] = email
             updated["attendee_email_source"] = "user"
-        name = self._extract_attendee_name(text)
         if name and (overwrite or not updated.get("attendee_name")):
             updated["attendee_name"] = name
-        parsed = self._extract_datetime(text)
-        title_match = re.search(
-            r"(?:meeting title|title|subject)\s*[:\-]\s*([^,;\n]+)",
-            text,
-            flags=re.IGNORECASE
-        )
+        parsed = self._extract_datetime(text, now=now)
+        title_match = _LABELED_TITLE_RE.search(text)
         if title_match and (overwrite or not updated.get("title")):
             updated["title"] = title_match.group(1).strip()
         elif (overwrite or not updated.get("title")) and not updated.get("title"):
             candidate = text.strip()
             if (
                 candidate
-                and not self._extract_emails(candidate)
+                and not emails
                 and not parsed
                 and not self._is_confirmation(candidate)
-                and not self._extract_attendee_name(candidate)
+                and not name
             ):
                 updated["title"] = candidate
         if parsed:
@@ -594,39 +750,67 @@ Only ask for attendee names when a name is provided without an email.
             if parsed.get("time") and (overwrite or not updated.get("time")):
                 updated["time"] = parsed["time"]
         if not updated.get("notes"):
-            notes_match = re.search(r"(?:about|regarding)\s+(.+)$", text, re.IGNORECASE)
+            notes_match = _NOTES_RE.search(text)
             if notes_match:
                 updated["notes"] = notes_match.group(1).strip()
         return updated
 
     def _is_schedule_request(self, text: str) -> bool:
         lowered = (text or "").lower()
-        return any(keyword in lowered for keyword in (
-            "schedule",
-            "book",
-            "meeting",
-            "appointment",
-            "calendar",
-            "invite"
-        ))
-
-    def _extract_details_from_history(self, messages: list) -> Dict[str, Any]:
+        return any(keyword in lowered for keyword in _SCHEDULE_KEYWORDS)
+
+    def _extract_details_from_history(
+        self,
+        messages: list,
+        now: Optional[datetime] = None,
+        conversation_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Aggregate details from user messages since the latest schedule request.
+
+        History is append-only, so per-conversation results are cached and only
+        messages added since the previous turn are parsed. A history window
+        that has moved (its first message id changed) is parsed again in full.
+        """
         if not messages:
             return {}
-        start_idx = None
-        for idx in range(len(messages) - 1, -1, -1):
+
+        start_idx: Optional[int] = None
+        processed = 0
+        details: Dict[str, Any] = {}
+        cached = self._history_details_cache.get(conversation_id) if conversation_id else None
+        if cached:
+            cached_head, cached_start, cached_content, cached_processed, cached_details = cached
+            if cached_head == messages[0].get('id') and cached_processed <= len(messages) and (
+                cached_start is None or messages[cached_start].get('content') == cached_content
+            ):
+                start_idx, processed, details = cached_start, cached_processed, cached_details
+
+        # A newer schedule request restarts aggregation from that message
+        for idx in range(len(messages) - 1, processed - 1, -1):
             msg = messages[idx]
             if msg.get('role') == 'user' and self._is_schedule_request(msg.get('content', '')):
-                start_idx = idx
+                start_idx, processed, details = idx, idx, {}
                 break
-        if start_idx is None:
-            return {}
-        details: Dict[str, Any] = {}
-        for msg in messages[start_idx:]:
-            if msg.get('role') != 'user':
-                continue
-            details = self._apply_extracted_fields(details, msg.get('content', ''), overwrite=False)
-        return details
+
+        if start_idx is not None:
+            for msg in messages[processed:]:
+                if msg.get('role') != 'user':
+                    continue
+                # The accumulator is private to the cache, so it is updated in place
+                self._apply_extracted_fields(details, msg.get('content', ''), overwrite=False, now=now, _inplace=True)
+
+        if conversation_id:
+            self._history_details_cache[conversation_id] = (
+                messages[0].get('id'),
+                start_idx,
+                messages[start_idx].get('content') if start_idx is not None else None,
+                len(messages),
+                details
+            )
+            self._history_details_cache.move_to_end(conversation_id)
+            while len(self._history_details_cache) > self.HISTORY_CACHE_SIZE:
+                self._history_details_cache.popitem(last=False)
+        return details.copy()
 
     def _merge_missing_details(self, base: Dict[str, Any], incoming: Dict[str, Any]) -> Dict[str, Any]:
         merged = base.copy()
@@ -638,43 +822,27 @@ Only ask for attendee names when a name is provided without an email.
         return merged
 
     def _is_confirmation(self, text: str) -> bool:
-        if not text:
-            return False
-        return bool(re.search(
-            r"\b(confirm|confirmed|yes|yep|yeah|sure|ok|okay|approve|go ahead|sounds good|book it|do it|please do)\b",
-            text.strip(),
-            flags=re.IGNORECASE
-        ))
+        return _is_confirmation_text(text)
 
-    def _extract_attendees(self, text: str) -> list[Dict[str, Any]]:
+    def _extract_attendees(
+        self,
+        text: str,
+        emails: Tuple[str, ...],
+        single_name: Optional[str]
+    ) -> list[Dict[str, Any]]:
         if not text:
             return []
         attendees: list[Dict[str, Any]] = []
-        email_pattern = r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}"
-        name_pattern = r"[A-Za-z][A-Za-z'\-\.]+(?:\s+[A-Za-z][A-Za-z'\-\.]+){0,3}"
-        pair_patterns = [
-            rf"({name_pattern})\s*<\s*({email_pattern})\s*>",
-            rf"({name_pattern})\s*\(\s*({email_pattern})\s*\)",
-            rf"({name_pattern})\s*[:\-]\s*({email_pattern})",
-        ]
-        for pattern in pair_patterns:
-            for name, email in re.findall(pattern, text, flags=re.IGNORECASE):
+        for pattern in _PAIR_RES:
+            for name, email in pattern.findall(text):
                 cleaned_name = self._normalize_attendee_name(name)
                 if cleaned_name:
                     attendees.append({"name": cleaned_name, "email": email.strip()})
                 else:
                     attendees.append({"email": email.strip()})
 
-        name_phrase = re.search(
-            r"(?:his name is|her name is|their name is|name is)\s+([^,.;\n]+)",
-            text,
-            flags=re.IGNORECASE
-        )
-        email_phrase = re.search(
-            rf"(?:email(?:id)? is|email(?: address)? is)\s*({email_pattern})",
-            text,
-            flags=re.IGNORECASE
-        )
+        name_phrase = _NAME_PHRASE_RE.search(text)
+        email_phrase = _EMAIL_PHRASE_RE.search(text)
         if name_phrase or email_phrase:
             attendees.append({
                 "name": name_phrase.group(1).strip() if name_phrase else None,
@@ -685,256 +853,322 @@ Only ask for attendee names when a name is provided without an email.
         for name in names:
             attendees.append({"name": name})
 
-        emails = self._extract_emails(text)
+        seen_emails = {att["email"].lower() for att in attendees if att.get("email")}
         for email in emails:
-            if not any((att.get("email") or "").lower() == email.lower() for att in attendees):
+            email_lower = email.lower()
+            if email_lower not in seen_emails:
+                seen_emails.add(email_lower)
                 attendees.append({"email": email})
 
-        single_name = self._extract_attendee_name(text)
-        if single_name and not any((att.get("name") or "").lower() == single_name.lower() for att in attendees):
-            attendees.append({"name": single_name})
+        if single_name:
+            single_lower = single_name.lower()
+            if single_lower not in {att["name"].lower() for att in attendees if att.get("name")}:
+                attendees.append({"name": single_name})
 
         return attendees
 
     def _extract_name_list(self, text: str) -> list[str]:
         if not text:
             return []
-        match = re.search(r"(?:with|invite|inviting|attendees?)\s+([^.;]+)", text, flags=re.IGNORECASE)
+        match = _NAME_LIST_RE.search(text)
         if not match:
             return []
         chunk = match.group(1)
-        chunk = re.split(r"\b(on|at|for|about|regarding)\b", chunk, maxsplit=1, flags=re.IGNORECASE)[0]
-        parts = re.split(r",| and ", chunk)
-        names: list[str] = []
-        for part in parts:
-            candidate = part.strip()
-            if not candidate:
-                continue
-            if re.search(r"\b(friend|parents|team|colleagues)\b", candidate, re.IGNORECASE):
-                continue
-            if re.match(r"^[A-Z][A-Za-z'\-\.]*(?:\s+[A-Z][A-Za-z'\-\.]*){0,3}$", candidate):
-                names.append(candidate)
-        return names
+        stop = _NAME_LIST_STOP_RE.search(chunk)
+        if stop:
+            chunk = chunk[:stop.start()]
+        return [
+            candidate
+            for part in _NAME_LIST_SPLIT_RE.split(chunk)
+            if _LIST_NAME_RE.fullmatch(candidate := part.strip())
+        ]
 
     def _merge_attendees(self, existing: list[Dict[str, Any]], new: list[Dict[str, Any]]) -> list[Dict[str, Any]]:
-        merged = [att.copy() for att in (existing or []) if att.get("name") or att.get("email")]
+        # Attendees are canonicalized on the way in, so emails can be compared directly
+        merged = [
+            canonical
+            for att in existing or []
+            if (canonical := _canonical_attendee(att))["name"] or canonical["email"]
+        ]
+        # Email/lowercased name -> earliest attendee carrying it, plus the attendees
+        # missing one of the two, so each incoming entry is matched in O(1)
+        position = {id(att): idx for idx, att in enumerate(merged)}
+        by_email: Dict[str, Dict[str, Any]] = {}
+        by_name: Dict[str, Dict[str, Any]] = {}
+        name_only: Dict[int, Dict[str, Any]] = {}
+        email_only: Dict[int, Dict[str, Any]] = {}
+
+        def claim(index: Dict[str, Dict[str, Any]], key: str, att: Dict[str, Any]) -> None:
+            current = index.get(key)
+            if current is None or position[id(att)] < position[id(current)]:
+                index[key] = att
+
+        def add(att: Dict[str, Any], name_key: Optional[str]) -> None:
+            position.setdefault(id(att), len(position))
+            email = att.get("email")
+            if email:
+                claim(by_email, email, att)
+            if name_key:
+                claim(by_name, name_key, att)
+            if name_key and not email:
+                name_only[id(att)] = att
+            elif email and not name_key:
+                email_only[id(att)] = att
+
+        def set_email(att: Dict[str, Any], email: str) -> None:
+            att["email"] = email
+            claim(by_email, email, att)
+            name_only.pop(id(att), None)
+
+        def set_name(att: Dict[str, Any], name: str, name_key: str) -> None:
+            att["name"] = name
+            claim(by_name, name_key, att)
+            email_only.pop(id(att), None)
+
+        for att in merged:
+            add(att, att["name"].lower() if att["name"] else None)
+
         for attendee in new or []:
-            name = attendee.get("name")
-            email = attendee.get("email")
+            canonical = _canonical_attendee(attendee)
+            name, email = canonical["name"], canonical["email"]
             if not name and not email:
                 continue
+            name_key = name.lower() if name else None
             if email:
-                match = next((att for att in merged if (att.get("email") or "").lower() == email.lower()), None)
+                match = by_email.get(email)
                 if match:
                     if name and not match.get("name"):
-                        match["name"] = name
+                        set_name(match, name, name_key)
+                    continue
+                if not name and len(name_only) == 1:
+                    set_email(next(iter(name_only.values())), email)
                     continue
-                if not name:
-                    name_only = [att for att in merged if att.get("name") and not att.get("email")]
-                    if len(name_only) == 1:
-                        name_only[0]["email"] = email
-                        continue
                 if name:
-                    name_match = next((att for att in merged if (att.get("name") or "").lower() == name.lower()), None)
+                    name_match = by_name.get(name_key)
                     if name_match:
                         if not name_match.get("email"):
-                            name_match["email"] = email
+                            set_email(name_match, email)
                         continue
-                merged.append({"name": name, "email": email})
+                entry = {"name": name, "email": email}
+                merged.append(entry)
+                add(entry, name_key)
                 continue
             if name:
-                match = next((att for att in merged if (att.get("name") or "").lower() == name.lower()), None)
-                if match:
+                if name_key in by_name:
                     continue
-                email_only = [att for att in merged if att.get("email") and not att.get("name")]
                 if len(email_only) == 1:
-                    email_only[0]["name"] = name
+                    set_name(next(iter(email_only.values())), name, name_key)
                     continue
-                merged.append({"name": name})
+                entry = {"name": name}
+                merged.append(entry)
+                add(entry, name_key)
         return merged
 
     def _missing_required_fields(self, details: Dict[str, Any]) -> list[str]:
-        missing: list[str] = []
-        if not details.get("title"):
-            missing.append("title")
-        if not details.get("date"):
-            missing.append("date")
-        if not details.get("time"):
-            missing.append("time")
-
-        attendees = details.get("attendees", [])
+        get = details.get
+        missing = [field for field in ("title", "date", "time") if not get(field)]
+
+        attendees = get("attendees")
         if not attendees:
             missing.append("attendee email")
             return missing
 
-        missing_emails = [att for att in attendees if not att.get("email")]
-        if missing_emails:
-            label = ", ".join(att.get("name") or "unknown attendee" for att in missing_emails)
-            missing.append(f"attendee email for {label}")
+        needs_email = [att.get("name") or "unknown attendee" for att in attendees if not att.get("email")]
+        if needs_email:
+            missing.append(f"attendee email for {', '.join(needs_email)}")
         return missing
 
-    def _time_fields_changed(
+    def _missing_fields_response(self, missing: list[str]) -> AgentResponse:
+        return AgentResponse(
+            agent_name=self.name,
+            status='needs_clarification',
+            message=_missing_fields_message(tuple(missing)),
+            clarification_question="What details should I use?"
+        )
+
+    @staticmethod
+    def _availability_key(details: Dict[str, Any]) -> tuple[Optional[str], Optional[str], int]:
+        return (details.get("date"), details.get("time"), int(details.get("duration_minutes") or 60))
+
+    def _availability_record(self, details: Dict[str, Any], status: str, checked_at: float) -> Dict[str, Any]:
+        date, time, duration = self._availability_key(details)
+        return {
+            "date": date,
+            "time": time,
+            "duration_minutes": duration,
+            "status": status,
+            "checked_at": checked_at,
+        }
+
+    async def _has_conflict(self, start_dt: datetime, end_dt: datetime) -> bool:
+        """Query Google Calendar free/busy off the event loop."""
+        return await asyncio.to_thread(
+            has_calendar_conflict,
+            start_dt.isoformat(),
+            end_dt.isoformat(),
+            settings.GOOGLE_CALENDAR_TIMEZONE
+        )
+
+    async def _ensure_availability_checked(
         self,
         details: Dict[str, Any],
-        prev_date: Optional[str],
-        prev_time: Optional[str],
-        prev_duration: int
-    ) -> bool:
-        return (
-            details.get("date") != prev_date
-            or details.get("time") != prev_time
-            or int(details.get("duration_minutes") or 60) != prev_duration
+        checked_at: float,
+        ttl_minutes: Optional[int] = None
+    ) -> Optional[AgentResponse]:
+        """Record whether the requested slot is free, querying the calendar at most once.
+
+        A stored result for the same slot is reused (only within ``ttl_minutes``
+        when given). Returns the reply for a conflict or failed lookup, else None.
+        """
+        availability = details.get("availability_checked")
+        if ttl_minutes is None:
+            reusable = bool(availability) and self._availability_key(availability) == self._availability_key(details)
+        else:
+            reusable = self._availability_check_is_fresh(details, ttl_minutes)
+        if reusable:
+            return self._conflict_response() if availability.get("status") == "conflict" else None
+
+        try:
+            start_dt, end_dt = self._build_event_times(details)
+            conflict = await self._has_conflict(start_dt, end_dt)
+        except CalendarSendError as exc:
+            return AgentResponse(
+                agent_name=self.name,
+                status='error',
+                message=f"I couldn't check calendar availability: {exc}",
+                data={'action': 'schedule', 'error': str(exc)}
+            )
+        except ValueError:
+            return None
+
+        if conflict:
+            details["availability_checked"] = self._availability_record(details, "conflict", checked_at)
+            details.pop("confirmation_snapshot", None)
+            return self._conflict_response()
+        details["availability_checked"] = self._availability_record(details, "clear", checked_at)
+        details["confirmation_snapshot"] = self._availability_record(details, "clear", checked_at)
+        return None
+
+    def _conflict_response(self) -> AgentResponse:
+        return AgentResponse(
+            agent_name=self.name,
+            status='needs_clarification',
+            message="That time conflicts with an existing event. Please choose another date or time.",
+            clarification_question="What date and time should I book instead?"
         )
 
     def _availability_check_is_fresh(self, details: Dict[str, Any], ttl_minutes: int = 5) -> bool:
         check = details.get("availability_checked")
         if not check:
             return False
-        if check.get("date") != details.get("date"):
-            return False
-        if check.get("time") != details.get("time"):
-            return False
-        if int(check.get("duration_minutes") or 60) != int(details.get("duration_minutes") or 60):
-            return False
+        # The stamp is compared first as it is cheaper than building the slot keys.
+        # It is wall-clock epoch seconds because any worker may read it back.
         checked_at = check.get("checked_at")
-        if not checked_at:
-            return False
-        try:
-            checked_dt = datetime.fromisoformat(checked_at)
-        except ValueError:
+        if isinstance(checked_at, (int, float)):
+            fresh = time() - checked_at <= ttl_minutes * 60
+        # Pending events saved before checks were stamped in epoch seconds hold a UTC ISO string
+        elif isinstance(checked_at, str):
+            try:
+                fresh = datetime.utcnow() - datetime.fromisoformat(checked_at) <= timedelta(minutes=ttl_minutes)
+            except ValueError:
+                return False
+        else:
             return False
-        return datetime.utcnow() - checked_dt <= timedelta(minutes=ttl_minutes)
+        return fresh and self._availability_key(check) == self._availability_key(details)
 
     def _confirmation_snapshot_is_valid(self, details: Dict[str, Any]) -> bool:
         snapshot = details.get("confirmation_snapshot")
-        if not snapshot:
-            return False
-        if snapshot.get("status") != "clear":
-            return False
-        if snapshot.get("date") != details.get("date"):
-            return False
-        if snapshot.get("time") != details.get("time"):
-            return False
-        if int(snapshot.get("duration_minutes") or 60) != int(details.get("duration_minutes") or 60):
-            return False
-        return True
+        return (
+            bool(snapshot)
+            and snapshot.get("status") == "clear"
+            and self._availability_key(snapshot) == self._availability_key(details)
+        )
 
     def _normalize_attendee_name(self, name: Optional[str]) -> Optional[str]:
-        if not name:
-            return None
-        tokens = [token for token in name.strip().split() if token]
-        if not tokens:
-            return None
-        if tokens[0].lower() in {"am", "pm"}:
-            tokens = tokens[1:]
-        cleaned = " ".join(tokens).strip()
-        return cleaned or None
+        return _normalize_attendee_name(name)
 
     def _format_attendees_for_user(self, attendees: list[Dict[str, Any]]) -> str:
-        formatted = []
-        for attendee in attendees or []:
-            name = (attendee.get("name") or "").strip()
-            email = (attendee.get("email") or "").strip()
-            if not name and not email:
-                continue
-            if name and email:
-                cleaned = self._normalize_attendee_name(name)
-                formatted.append(f"{cleaned or name} <{email}>")
-            elif email:
-                formatted.append(email)
-            else:
-                formatted.append(self._normalize_attendee_name(name) or name)
+        formatted = [
+            display
+            for attendee in attendees or []
+            if (display := _render_attendee(attendee.get("name") or "", attendee.get("email") or ""))
+        ]
         return ", ".join(formatted) if formatted else "None"
 
     def _build_confirmation_message(self, details: Dict[str, Any]) -> str:
-        title = details.get("title") or "Meeting"
-        date = details.get("date") or "TBD"
-        time = details.get("time") or "TBD"
-        attendees = self._format_attendees_for_user(details.get("attendees", []))
-        timezone = settings.GOOGLE_CALENDAR_TIMEZONE
-        lines = [
-            "Please confirm the meeting details:",
-            f"Title: {title}",
-            f"When: {date} {time} ({timezone})",
-            f"Attendees: {attendees}",
-        ]
-        if details.get("location"):
-            lines.append(f"Location: {details.get('location')}")
-        lines.append('Reply "confirm" to book this meeting and send the invite.')
-        return "\n".join(lines)
-
-    def _get_pending_event(self, conversation_id: str) -> Optional[Dict[str, Any]]:
-        session = db_session()
-        try:
-            conversation = session.query(Conversation).filter(
-                Conversation.id == uuid.UUID(conversation_id)
-            ).first()
-            if not conversation or not conversation.metadata_:
-                return None
-            return conversation.metadata_.get('pending_event')
-        finally:
-            session.close()
+        return "\n".join(self._iter_confirmation_lines(details))
+
+    def _iter_confirmation_lines(self, details: Dict[str, Any]) -> Iterator[str]:
+        get = details.get
+        yield "Please confirm the meeting details:"
+        yield f"Title: {get('title') or 'Meeting'}"
+        yield _WHEN_LINE(get('date') or 'TBD', get('time') or 'TBD', settings.GOOGLE_CALENDAR_TIMEZONE)
+        yield f"Attendees: {self._format_attendees_for_user(get('attendees', []))}"
+        location = get("location")
+        if location:
+            yield f"Location: {location}"
+        yield 'Reply "confirm" to book this meeting and send the invite.'
+
+    @contextmanager
+    def _pending_event_txn(self, conversation_id: str) -> Iterator[_PendingEventWrite]:
+        """Load the stored pending event and persist the turn's changes to it on exit.
+
+        The load and the write each use their own short scope, so no connection
+        or transaction is held across the free/busy lookup, event creation or
+        invite sends in between.
+        """
+        with self._conversation_scope(conversation_id) as conversation:
+            stored = self._conversation_metadata(conversation, 'pending_event')
+        txn = _PendingEventWrite(details=stored, stored=stored)
+        yield txn
+        if txn.clear:
+            value = None
+        elif txn.details is not None and txn.details != stored:
+            value = txn.details
+        else:
+            return
+        with self._conversation_scope(conversation_id) as conversation:
+            self._set_conversation_metadata(conversation, 'pending_event', value)
 
-    def _set_pending_event(self, conversation_id: str, details: Dict[str, Any]) -> None:
-        session = db_session()
-        try:
-            conversation = session.query(Conversation).filter(
-                Conversation.id == uuid.UUID(conversation_id)
-            ).first()
-            if not conversation:
-                return
-            metadata = conversation.metadata_ or {}
-            metadata['pending_event'] = details
-            conversation.metadata_ = metadata
-            session.commit()
-        finally:
-            session.close()
-
-    def _clear_pending_event(self, conversation_id: str) -> None:
-        session = db_session()
-        try:
-            conversation = session.query(Conversation).filter(
-                Conversation.id == uuid.UUID(conversation_id)
-            ).first()
-            if not conversation or not conversation.metadata_:
-                return
-            metadata = conversation.metadata_
-            metadata.pop('pending_event', None)
-            conversation.metadata_ = metadata
-            session.commit()
-        finally:
-            session.close()
-
-    def _send_pending_event(self, conversation_id: str, details: Dict[str, Any]) -> AgentResponse:
+    async def _send_pending_event(self, details: Dict[str, Any]) -> AgentResponse:
         try:
             start_dt, end_dt = self._build_event_times(details)
-            event = {
-                "summary": details.get("title", "Meeting"),
-                "description": details.get("notes") or "Scheduled via Chief of Staff",
-                "location": details.get("location"),
-                "start": {
-                    "dateTime": start_dt.isoformat(),
-                    "timeZone": settings.GOOGLE_CALENDAR_TIMEZONE,
-                },
-                "end": {
-                    "dateTime": end_dt.isoformat(),
-                    "timeZone": settings.GOOGLE_CALENDAR_TIMEZONE,
-                },
-            }
-            event["conferenceData"] = {
-                "createRequest": {
-                    "requestId": uuid.uuid4().hex,
-                    "conferenceSolutionKey": {"type": "hangoutsMeet"},
-                }
-            }
-            attendees = details.get("attendees") or []
+            # Read every field once; the API payload and the invite share them
+            get = details.get
+            title = get("title", "Meeting")
+            location = get("location")
+            timezone = settings.GOOGLE_CALENDAR_TIMEZONE
+            attendees = get("attendees") or []
             if not attendees:
-                attendee_email = details.get("attendee_email")
-                attendee_name = details.get("attendee_name")
+                attendee_email = get("attendee_email")
                 if attendee_email:
-                    attendees = [{"email": attendee_email, "name": attendee_name}]
+                    attendees = [{"email": attendee_email, "name": get("attendee_name")}]
 
-            booking_details = create_calendar_event_details(
+            event = {
+                "summary": title,
+                "description": get("notes") or "Scheduled via Chief of Staff",
+                "location": location,
+                "start": {"dateTime": start_dt.isoformat(), "timeZone": timezone},
+                "end": {"dateTime": end_dt.isoformat(), "timeZone": timezone},
+                "conferenceData": {
+                    "createRequest": {
+                        "requestId": uuid.uuid4().hex,
+                        "conferenceSolutionKey": {"type": "hangoutsMeet"},
+                    }
+                },
+            }
+            # Invite lines after the Meet link don't depend on the booking result
+            invite_tail = []
+            if location:
+                invite_tail.append(f"Location: {location}")
+            attendees_text = self._format_attendees_for_user(attendees)
+            if attendees_text != "None":
+                invite_tail.append(f"Attendees: {attendees_text}")
+            invite_tail.append("")
+            invite_tail.append("This invite was sent by Chief of Staff.")
+
+            booking_details = await asyncio.to_thread(
+                create_calendar_event_details,
                 event,
                 send_updates="none",
                 conference_data_version=1,
@@ -942,32 +1176,27 @@ Only ask for attendee names when a name is provided without an email.
             link = booking_details.get("htmlLink", "")
             meet_link = booking_details.get("meetLink", "")
             email_failures: list[str] = []
-            if attendees:
-                title = details.get("title", "Meeting")
-                when = f"{details.get('date')} {details.get('time')} ({settings.GOOGLE_CALENDAR_TIMEZONE})"
-                attendees_text = self._format_attendees_for_user(attendees)
-                lines = [
-                    f"Title: {title}",
-                    f"When: {when}",
-                ]
+            recipients = [attendee for attendee in attendees if attendee.get("email")]
+            if recipients:
+                lines = [f"Title: {title}", _WHEN_LINE(get('date'), get('time'), timezone)]
                 if meet_link:
                     lines.append(f"Google Meet: {meet_link}")
-                if details.get("location"):
-                    lines.append(f"Location: {details.get('location')}")
-                if attendees_text and attendees_text != "None":
-                    lines.append(f"Attendees: {attendees_text}")
-                lines.append("")
-                lines.append("This invite was sent by Chief of Staff.")
+                lines.extend(invite_tail)
                 body = "\n".join(lines)
                 subject = f"Meeting Invite: {title}"
-                for attendee in attendees:
-                    email = attendee.get("email")
-                    if not email:
-                        continue
-                    try:
-                        send_email(email, subject, body, to_name=attendee.get("name"))
-                    except EmailSendError as exc:
-                        email_failures.append(f"{email} ({exc})")
+                # Each invite is its own SMTP session, so they go out concurrently
+                results = await asyncio.gather(
+                    *(
+                        asyncio.to_thread(send_email, attendee["email"], subject, body, to_name=attendee.get("name"))
+                        for attendee in recipients
+                    ),
+                    return_exceptions=True
+                )
+                for attendee, result in zip(recipients, results):
+                    if isinstance(result, EmailSendError):
+                        email_failures.append(f"{attendee['email']} ({result})")
+                    elif isinstance(result, BaseException):
+                        raise result
         except CalendarSendError as exc:
             return AgentResponse(
                 agent_name=self.name,
@@ -976,7 +1205,6 @@ Only ask for attendee names when a name is provided without an email.
                 data={'action': 'schedule', 'error': str(exc)}
             )
         except ValueError as exc:
-            self._set_pending_event(conversation_id, details)
             return AgentResponse(
                 agent_name=self.name,
                 status='needs_clarification',
@@ -984,7 +1212,6 @@ Only ask for attendee names when a name is provided without an email.
                 clarification_question="What date and time should I use?"
             )
 
-        self._clear_pending_event(conversation_id)
         response = "Event created on your Google Calendar."
         if meet_link:
             response += f" Google Meet link: {meet_link}."
@@ -1009,12 +1236,16 @@ Only ask for attendee names when a name is provided without an email.
             raise ValueError("Missing date or time for the event.")
 
         try:
-            start = datetime.strptime(f"{date_str} {time_str}", "%Y-%m-%d %H:%M")
-        except ValueError as exc:
-            raise ValueError("Please provide date as YYYY-MM-DD and time as HH:MM (24-hour).") from exc
+            # Stored values are zero-padded ISO, which fromisoformat handles without a format string
+            start = datetime.fromisoformat(f"{date_str}T{time_str}")
+        except ValueError:
+            try:
+                start = datetime.strptime(f"{date_str} {time_str}", "%Y-%m-%d %H:%M")
+            except ValueError as exc:
+                raise ValueError("Please provide date as YYYY-MM-DD and time as HH:MM (24-hour).") from exc
 
         try:
-            tz = ZoneInfo(settings.GOOGLE_CALENDAR_TIMEZONE)
+            tz = _get_timezone(settings.GOOGLE_CALENDAR_TIMEZONE)
         except Exception as exc:
             raise ValueError("Invalid Google Calendar timezone setting.") from exc
 
@@ -1,13 +1,43 @@
 """Email Agent - Handles email composition, summarization, and communication tasks."""
-import json
-import uuid
-from typing import Dict, Any, List, Optional
-from langchain_core.messages import HumanMessage, SystemMessage
+import asyncio
+import re
+from types import MappingProxyType
+from typing import Dict, Any, List, Optional, Tuple
+from langchain_core.messages import HumanMessage
 
 from app.agents.base import BaseAgent, AgentState, AgentResponse
-from app.models.database import db_session, Conversation
 from app.services.email_sender import send_email, EmailSendError
 
+# Whole replies (lowercased, stripped) that confirm or cancel the pending draft
+_CONFIRM_PHRASES = frozenset({
+    "send",
+    "send it",
+    "yes",
+    "y",
+    "confirm",
+    "go ahead",
+    "please send",
+    "send now",
+})
+_CANCEL_PHRASES = frozenset({
+    "cancel",
+    "no",
+    "don't send",
+    "do not send",
+    "stop",
+})
+# Direct edits to a pending draft ("subject: Q3 update", "change the body to ..."),
+# applied without another LLM round trip
+_DRAFT_EDIT_RES = (
+    re.compile(r"^\s*(subject|recipient|to|body)\s*[:=]\s*(.+?)\s*$", re.IGNORECASE | re.DOTALL),
+    re.compile(
+        r"^\s*(?:change|set|update)\s+(?:the\s+)?(subject|recipient|body)\s+to\s+(.+?)\s*$",
+        re.IGNORECASE | re.DOTALL
+    ),
+)
+_DRAFT_FIELDS = MappingProxyType({'subject': 'subject', 'body': 'body', 'to': 'to', 'recipient': 'to'})
+_EMAIL_ADDRESS_RE = re.compile(r"^[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}$")
+
 
 class EmailAgent(BaseAgent):
     """
@@ -57,6 +87,9 @@ Response Format (JSON):
 If the user asks to send an email, produce a draft and do not send.
 The app requires a confirmation step before sending."""
 
+    # "Email alice@..." and "email bob@..." embed almost identically
+    SEMANTIC_CACHE_MATCHING = False
+
     def __init__(self):
         super().__init__(
             name="email",
@@ -76,7 +109,8 @@ The app requires a confirmation step before sending."""
     async def process(self, state: AgentState) -> AgentResponse:
         """Process email-related requests."""
         conversation_id = state.get('conversation_id')
-        if not conversation_id:
+        # Malformed ids are rejected here rather than after a pool checkout
+        if not self._is_valid_conversation_id(conversation_id):
             return AgentResponse(
                 agent_name=self.name,
                 status='needs_clarification',
@@ -84,23 +118,54 @@ The app requires a confirmation step before sending."""
                 clarification_question='Which conversation should I use to send this email?'
             )
 
-        pending = self._get_pending_email(conversation_id)
+        # Only an exact confirm/cancel reply can act on the pending draft, so other
+        # turns skip the lookup
         task_text = state.get('task', '')
-        if pending and self._is_confirmation(task_text):
-            return self._send_pending_email(conversation_id, pending)
-        if pending and self._is_cancellation(task_text):
-            self._clear_pending_email(conversation_id)
-            return AgentResponse(
-                agent_name=self.name,
-                status='success',
-                message='Okay, I will not send that email.',
-                data={'action': 'cancel_send'}
-            )
+        if self._is_confirmation(task_text) or self._is_cancellation(task_text):
+            with self._conversation_scope(conversation_id) as conversation:
+                pending = self._conversation_metadata(conversation, 'pending_email')
+                if pending and self._is_cancellation(task_text):
+                    self._set_conversation_metadata(conversation, 'pending_email', None)
+                    return AgentResponse(
+                        agent_name=self.name,
+                        status='success',
+                        message='Okay, I will not send that email.',
+                        data={'action': 'cancel_send'}
+                    )
+            if pending:
+                # SMTP runs outside the scope, so no connection is held while sending
+                response = self._send_pending_email(pending)
+                if response.status == 'success':
+                    with self._conversation_scope(conversation_id) as conversation:
+                        self._set_conversation_metadata(conversation, 'pending_email', None)
+                return response
+
+        edit = self._parse_draft_edit(task_text)
+        if edit:
+            with self._conversation_scope(conversation_id) as conversation:
+                pending = self._conversation_metadata(conversation, 'pending_email')
+                if pending:
+                    field, value = edit
+                    draft = {**pending, field: value}
+                    if field == 'to':
+                        draft['to_name'] = None
+                    self._set_conversation_metadata(conversation, 'pending_email', draft)
+                    return AgentResponse(
+                        agent_name=self.name,
+                        status='success',
+                        message=(
+                            f"Updated the {field}.\n\n{self._format_email_display(draft)}"
+                            "\n\nReply “send it” to confirm sending."
+                        ),
+                        data={'action': 'edit', 'email_content': draft}
+                    )
+
+        # Retrieve relevant email memories while the prompt context is built
+        memories_task = asyncio.create_task(self.retrieve_memories(state['task'], limit=3))
 
         context = self._build_context(state)
 
-        # Retrieve relevant email memories
-        memories = await self.retrieve_memories(state['task'], limit=3)
+        memories = await memories_task
         memory_context = ""
         if memories:
             memory_context = "\n\nPrevious Communication Context:\n" + "\n".join([
@@ -108,7 +173,7 @@ The app requires a confirmation step before sending."""
             ])
 
         messages = [
-            SystemMessage(content=self.system_prompt),
+            self._system_msg,
             HumanMessage(content=f"""
 {context}
 {memory_context}
@@ -121,21 +186,15 @@ For summarization, provide key points and action items.
 """)
         ]
 
-        response_text = await self._call_llm(messages)
+        response_text = await self._call_llm(messages, json_mode=True)
 
         # Parse response
-        try:
-            json_start = response_text.find('{')
-            json_end = response_text.rfind('}') + 1
-            if json_start != -1 and json_end > json_start:
-                result = json.loads(response_text[json_start:json_end])
-            else:
-                result = self._create_default_response(state['task'])
-        except json.JSONDecodeError:
+        result = self._parse_json_response(response_text)
+        if result is None:
             result = self._create_default_response(state['task'])
 
         # Store interaction in memory
-        await self.store_memory(
+        self.store_memory_in_background(
             content=f"Email action: {result.get('action', 'unknown')} - {result.get('email_content', {}).get('subject', state['task'][:50])}",
             memory_type='episodic',
             conversation_id=state.get('conversation_id'),
@@ -194,77 +253,34 @@ For summarization, provide key points and action items.
         return "\n".join(lines)
 
     def _is_confirmation(self, text: str) -> bool:
-        lowered = text.lower().strip()
-        return lowered in {
-            "send",
-            "send it",
-            "yes",
-            "y",
-            "confirm",
-            "go ahead",
-            "please send",
-            "send now"
-        }
+        return text.lower().strip() in _CONFIRM_PHRASES
 
     def _is_cancellation(self, text: str) -> bool:
-        lowered = text.lower().strip()
-        return lowered in {
-            "cancel",
-            "no",
-            "don't send",
-            "do not send",
-            "stop"
-        }
-
-    def _get_pending_email(self, conversation_id: str) -> Optional[Dict[str, Any]]:
-        session = db_session()
-        try:
-            conversation = session.query(Conversation).filter(
-                Conversation.id == uuid.UUID(conversation_id)
-            ).first()
-            if not conversation or not conversation.metadata_:
-                return None
-            return conversation.metadata_.get('pending_email')
-        finally:
-            session.close()
+        return text.lower().strip() in _CANCEL_PHRASES
+
+    def _parse_draft_edit(self, text: str) -> Optional[Tuple[str, str]]:
+        """Return (field, value) when the text only edits one field of the draft."""
+        for pattern in _DRAFT_EDIT_RES:
+            match = pattern.match(text)
+            if match:
+                field = _DRAFT_FIELDS[match.group(1).lower()]
+                value = match.group(2)
+                if field == 'to' and not _EMAIL_ADDRESS_RE.match(value):
+                    return None
+                return field, value
+        return None
 
     def _set_pending_email(self, conversation_id: str, email_content: Dict[str, Any]) -> None:
-        session = db_session()
-        try:
-            conversation = session.query(Conversation).filter(
-                Conversation.id == uuid.UUID(conversation_id)
-            ).first()
-            if not conversation:
-                return
-            metadata = conversation.metadata_ or {}
-            metadata['pending_email'] = {
+        with self._conversation_scope(conversation_id) as conversation:
+            self._set_conversation_metadata(conversation, 'pending_email', {
                 'to': email_content.get('to'),
                 'to_name': email_content.get('to_name'),
                 'subject': email_content.get('subject'),
                 'body': email_content.get('body'),
                 'tone': email_content.get('tone')
-            }
-            conversation.metadata_ = metadata
-            session.commit()
-        finally:
-            session.close()
-
-    def _clear_pending_email(self, conversation_id: str) -> None:
-        session = db_session()
-        try:
-            conversation = session.query(Conversation).filter(
-                Conversation.id == uuid.UUID(conversation_id)
-            ).first()
-            if not conversation or not conversation.metadata_:
-                return
-            metadata = conversation.metadata_
-            metadata.pop('pending_email', None)
-            conversation.metadata_ = metadata
-            session.commit()
-        finally:
-            session.close()
-
-    def _send_pending_email(self, conversation_id: str, pending: Dict[str, Any]) -> AgentResponse:
+            })
+
+    def _send_pending_email(self, pending: Dict[str, Any]) -> AgentResponse:
         try:
             send_email(
                 to_email=pending.get('to', ''),
@@ -280,7 +296,6 @@ For summarization, provide key points and action items.
                 data={'action': 'send', 'error': str(exc)}
             )
 
-        self._clear_pending_email(conversation_id)
         return AgentResponse(
             agent_name=self.name,
             status='success',
@@ -1,9 +1,12 @@
 """LangGraph workflow for multi-agent orchestration."""
 import asyncio
-from typing import Dict, Any, Literal, Optional
+import functools
+import itertools
+import threading
+from typing import AsyncIterator, Dict, Any, List, Literal, Optional, Type
 from langgraph.graph import StateGraph, END
 
-from app.agents.base import AgentState, AgentResponse
+from app.agents.base import AgentState, AgentResponse, BaseAgent, conversation_turn, drain_pending_writes
 from app.agents.orchestrator import MasterOrchestrator
 from app.agents.calendar_agent import CalendarAgent
 from app.agents.email_agent import EmailAgent
@@ -12,103 +15,81 @@ from app.agents.task_agent import TaskAgent
 from app.agents.analytics_agent import AnalyticsAgent
 from app.agents.pdf_agent import PdfAgent
 from app.config import settings
-
-
-# Initialize all agents
-orchestrator = MasterOrchestrator()
-calendar_agent = CalendarAgent()
-email_agent = EmailAgent()
-research_agent = ResearchAgent()
-task_agent = TaskAgent()
-analytics_agent = AnalyticsAgent()
-pdf_agent = PdfAgent()
-
-# Agent registry
-AGENTS = {
-    'orchestrator': orchestrator,
-    'calendar': calendar_agent,
-    'email': email_agent,
-    'research': research_agent,
-    'task': task_agent,
-    'analytics': analytics_agent,
-    'pdf': pdf_agent
+from app.models.database import dispose_async_engine
+
+
+# Read once; routing checks it on every hop
+_MAX_ITERATIONS = settings.MAX_AGENT_ITERATIONS
+
+# Agent turns running at once in this worker, across every endpoint. Each turn
+# runs on its own event loop, so this is a thread semaphore (a greenlet one under
+# gevent): acquire it before entering the loop, never from a coroutine.
+workflow_slots = threading.BoundedSemaphore(settings.MAX_CONCURRENT_WORKFLOWS)
+
+# Agent registry: classes by routing name, instantiated on first use (see get_agent)
+AGENTS: Dict[str, Type[BaseAgent]] = {
+    'orchestrator': MasterOrchestrator,
+    'calendar': CalendarAgent,
+    'email': EmailAgent,
+    'research': ResearchAgent,
+    'task': TaskAgent,
+    'analytics': AnalyticsAgent,
+    'pdf': PdfAgent
 }
 
 
-async def orchestrator_node(state: AgentState) -> AgentState:
-    """Orchestrator node - analyzes request and delegates."""
-    response = await orchestrator.process(state)
+@functools.cache
+def get_agent(name: str) -> BaseAgent:
+    """Get the process-wide instance of an agent, creating it on first use."""
+    return AGENTS[name]()
 
-    # Update state with response
-    new_message = {
-        'role': 'assistant',
-        'content': response.message,
-        'agent_name': response.agent_name,
-        'thoughts': response.thoughts,
-        'tool_calls': response.tool_calls
-    }
-
-    new_results = state.get('results', []).copy()
-    new_results.append({
-        'agent_name': response.agent_name,
-        'status': response.status,
-        'message': response.message,
-        'data': response.data,
-        'summary': response.message[:200]
-    })
 
-    return {
-        **state,
-        'messages': state['messages'] + [new_message],
-        'current_agent': 'orchestrator',
-        'results': new_results,
-        'next_agent': response.next_agent,
-        'should_continue': response.status == 'delegated',
-        'user_clarification_needed': response.status == 'needs_clarification',
-        'clarification_question': response.clarification_question,
-        'iteration_count': state.get('iteration_count', 0) + 1
-    }
+async def orchestrator_node(state: AgentState) -> Dict[str, Any]:
+    """Orchestrator node - analyzes request and delegates."""
+    response = await get_agent('orchestrator').process(state)
+    # The orchestrator sets next_agent exactly when it delegates
+    return _update_state_with_response(state, response, 'orchestrator')
 
 
-async def calendar_node(state: AgentState) -> AgentState:
+async def calendar_node(state: AgentState) -> Dict[str, Any]:
     """Calendar agent node."""
-    response = await calendar_agent.process(state)
+    response = await get_agent('calendar').process(state)
     return _update_state_with_response(state, response, 'calendar')
 
 
-async def email_node(state: AgentState) -> AgentState:
+async def email_node(state: AgentState) -> Dict[str, Any]:
     """Email agent node."""
-    response = await email_agent.process(state)
+    response = await get_agent('email').process(state)
     return _update_state_with_response(state, response, 'email')
 
 
-async def research_node(state: AgentState) -> AgentState:
+async def research_node(state: AgentState) -> Dict[str, Any]:
     """Research agent node."""
-    response = await research_agent.process(state)
+    response = await get_agent('research').process(state)
     return _update_state_with_response(state, response, 'research')
 
 
-async def task_node(state: AgentState) -> AgentState:
+async def task_node(state: AgentState) -> Dict[str, Any]:
     """Task agent node."""
-    response = await task_agent.process(state)
+    response = await get_agent('task').process(state)
     return _update_state_with_response(state, response, 'task')
 
 
-async def analytics_node(state: AgentState) -> AgentState:
+async def analytics_node(state: AgentState) -> Dict[str, Any]:
     """Analytics agent node."""
-    response = await analytics_agent.process(state)
+    response = await get_agent('analytics').process(state)
     return _update_state_with_response(state, response, 'analytics')
 
 
-async def pdf_node(state: AgentState) -> AgentState:
+async def pdf_node(state: AgentState) -> Dict[str, Any]:
     """PDF export agent node."""
-    response = await pdf_agent.process(state)
+    response = await get_agent('pdf').process(state)
     return _update_state_with_response(state, response, 'pdf')
 
 
-async def synthesizer_node(state: AgentState) -> AgentState:
+async def synthesizer_node(state: AgentState) -> Dict[str, Any]:
     """Synthesizer node - combines results from all agents."""
-    response = await orchestrator.synthesize_results(state)
+    response = await get_agent('orchestrator').synthesize_results(state)
 
     new_message = {
         'role': 'assistant',
@@ -119,17 +100,70 @@ async def synthesizer_node(state: AgentState) -> AgentState:
     }
 
     return {
-        **state,
-        'messages': state['messages'] + [new_message],
+        'messages': [new_message],
         'current_agent': 'synthesizer',
         'should_continue': False,
-        'iteration_count': state.get('iteration_count', 0) + 1
+        'iteration_count': 1
     }
 
 
-def _update_state_with_response(state: AgentState, response: AgentResponse, agent_name: str) -> AgentState:
-    """Helper to update state with agent response."""
-    new_message = {
+async def parallel_workers_node(state: AgentState) -> Dict[str, Any]:
+    """Run the plan's delegations stage by stage, in parallel within a stage.
+
+    Stages follow the plan's priorities, so a later step sees the messages of
+    the steps before it; the synthesizer combines all results.
+    """
+    delegations = _planned_delegations(state)
+    semaphore = asyncio.Semaphore(settings.MAX_PARALLEL_AGENTS)
+    new_messages = []
+    new_results = []
+    clarification_question = None
+
+    async def run(delegation: Dict[str, Any], stage_state: AgentState) -> AgentResponse:
+        async with semaphore:
+            return await get_agent(delegation['agent'].lower()).process(
+                {**stage_state, 'task': delegation.get('task') or state['task']}
+            )
+
+    for stage in _delegation_stages(delegations):
+        stage_state = {
+            **state,
+            'messages': [*state['messages'], *new_messages],
+            'results': [*state['results'], *new_results]
+        }
+        responses = await asyncio.gather(*(run(d, stage_state) for d in stage), return_exceptions=True)
+        for delegation, response in zip(stage, responses):
+            if isinstance(response, Exception):
+                # One failing agent shouldn't discard the others' results
+                response = AgentResponse(
+                    agent_name=delegation['agent'].lower(),
+                    status='error',
+                    message=f"This part of the request failed: {response}"
+                )
+            elif isinstance(response, BaseException):
+                raise response
+            new_messages.append(_response_message(response))
+            new_results.append(_response_result(response))
+            if response.status == 'needs_clarification' and clarification_question is None:
+                clarification_question = response.clarification_question
+        # Later steps may depend on the answer, so ask before running them
+        if clarification_question is not None:
+            break
+
+    return {
+        'messages': new_messages,
+        'current_agent': 'parallel_workers',
+        'results': new_results,
+        'next_agent': None,
+        'should_continue': False,
+        'user_clarification_needed': clarification_question is not None,
+        'clarification_question': clarification_question,
+        'iteration_count': len(new_results)
+    }
+
+
+def _response_message(response: AgentResponse) -> Dict[str, Any]:
+    return {
         'role': 'assistant',
         'content': response.message,
         'agent_name': response.agent_name,
@@ -137,39 +171,87 @@ def _update_state_with_response(state: AgentState, response: AgentResponse, agen
         'tool_calls': response.tool_calls
     }
 
-    new_results = state.get('results', []).copy()
-    new_results.append({
+
+def _response_result(response: AgentResponse) -> Dict[str, Any]:
+    return {
         'agent_name': response.agent_name,
         'status': response.status,
         'message': response.message,
         'data': response.data,
         'summary': response.message[:200]
-    })
+    }
 
-    needs_clarification = response.status == 'needs_clarification'
+
+def _planned_delegations(state: AgentState) -> List[Dict[str, Any]]:
+    """Delegations to known worker agents from the orchestrator's plan."""
+    results = state.get('results') or []
+    if not results or results[-1].get('agent_name') != 'orchestrator':
+        return []
+    return [
+        delegation
+        for delegation in (results[-1].get('data') or {}).get('delegations') or []
+        if (delegation.get('agent') or '').lower() in AGENTS
+        and delegation['agent'].lower() != 'orchestrator'
+    ]
+
+
+def _delegation_priority(delegation: Dict[str, Any]) -> float:
+    priority = delegation.get('priority', 5)
+    return priority if isinstance(priority, (int, float)) else 5
+
+
+def _delegation_stages(delegations: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    """Split delegations into stages: one per priority level, most urgent first.
+
+    A second task for the same agent moves to a further stage of its level
+    rather than racing the first on that agent's conversation state.
+    """
+    stages: List[List[Dict[str, Any]]] = []
+    ordered = sorted(delegations, key=_delegation_priority)
+    for _, group in itertools.groupby(ordered, key=_delegation_priority):
+        level: List[List[Dict[str, Any]]] = []
+        for delegation in group:
+            agent = delegation['agent'].lower()
+            stage = next((s for s in level if all(d['agent'].lower() != agent for d in s)), None)
+            if stage is None:
+                stage = []
+                level.append(stage)
+            stage.append(delegation)
+        stages.extend(level)
+    return stages
+
+
+def _update_state_with_response(state: AgentState, response: AgentResponse, agent_name: str) -> Dict[str, Any]:
+    """Helper to build the state update for an agent response.
+
+    Only the changes are returned; AgentState's reducers append them.
+    """
     return {
-        **state,
-        'messages': state['messages'] + [new_message],
+        'messages': [_response_message(response)],
         'current_agent': agent_name,
-        'results': new_results,
+        'results': [_response_result(response)],
         'next_agent': response.next_agent,
         'should_continue': response.next_agent is not None,
-        'user_clarification_needed': needs_clarification,
+        'user_clarification_needed': response.status == 'needs_clarification',
         'clarification_question': response.clarification_question,
-        'iteration_count': state.get('iteration_count', 0) + 1
+        'iteration_count': 1
     }
 
 
 def route_after_orchestrator(state: AgentState) -> str:
     """Determine next step after orchestrator."""
     # Check iteration limit
-    if state.get('iteration_count', 0) >= settings.MAX_AGENT_ITERATIONS:
+    if state.get('iteration_count', 0) >= _MAX_ITERATIONS:
         return 'synthesizer'
 
     # If clarification needed, go to end (wait for user input)
     if state.get('user_clarification_needed'):
         return END
 
+    # A multi-step plan runs every step instead of only the first one
+    if len(_planned_delegations(state)) > 1:
+        return 'parallel_workers'
+
     # Route to next agent
     next_agent = state.get('next_agent')
     if next_agent and next_agent in AGENTS:
@@ -182,7 +264,7 @@ def route_after_orchestrator(state: AgentState) -> str:
 def route_after_worker(state: AgentState) -> str:
     """Determine next step after a worker agent."""
     # Check iteration limit
-    if state.get('iteration_count', 0) >= settings.MAX_AGENT_ITERATIONS:
+    if state.get('iteration_count', 0) >= _MAX_ITERATIONS:
         return 'synthesizer'
 
     if state.get('user_clarification_needed'):
@@ -217,6 +299,7 @@ def create_agent_graph() -> StateGraph:
     workflow.add_node('task_agent', task_node)
     workflow.add_node('analytics', analytics_node)
     workflow.add_node('pdf', pdf_node)
+    workflow.add_node('parallel_workers', parallel_workers_node)
     workflow.add_node('synthesizer', synthesizer_node)
 
     # Set entry point
@@ -233,6 +316,7 @@ def create_agent_graph() -> StateGraph:
             'task': 'task_agent',
             'analytics': 'analytics',
             'pdf': 'pdf',
+            'parallel_workers': 'parallel_workers',
             'synthesizer': 'synthesizer',
             END: END
         }
@@ -255,6 +339,9 @@ def create_agent_graph() -> StateGraph:
             }
         )
 
+    # Parallel results are always combined by the synthesizer
+    workflow.add_edge('parallel_workers', 'synthesizer')
+
     # Synthesizer always ends
     workflow.add_edge('synthesizer', END)
 
@@ -265,26 +352,13 @@ def create_agent_graph() -> StateGraph:
 agent_graph = create_agent_graph()
 
 
-async def run_agent_workflow(
+def _initial_state(
     task: str,
     conversation_id: str,
-    messages: list = None,
-    context: dict = None
-) -> Dict[str, Any]:
-    """
-    Run the agent workflow for a given task.
-
-    Args:
-        task: The user's request/task
-        conversation_id: ID of the conversation
-        messages: Previous messages in the conversation
-        context: Additional context (RAG results, etc.)
-
-    Returns:
-        Dict with the final response and agent results
-    """
-    # Initialize state
-    initial_state: AgentState = {
+    messages: Optional[list],
+    context: Optional[dict]
+) -> AgentState:
+    return {
         'messages': messages or [],
         'current_agent': '',
         'task': task,
@@ -298,10 +372,8 @@ async def run_agent_workflow(
         'iteration_count': 0
     }
 
-    # Run the graph
-    final_state = await agent_graph.ainvoke(initial_state)
 
-    # Extract final response
+def _workflow_result(final_state: Dict[str, Any]) -> Dict[str, Any]:
     final_messages = final_state.get('messages', [])
     final_message = final_messages[-1] if final_messages else {'content': 'No response generated.'}
 
@@ -316,3 +388,87 @@ async def run_agent_workflow(
         'all_results': final_state.get('results', []),
         'iteration_count': final_state.get('iteration_count', 0)
     }
+
+
+async def release_workflow_resources() -> None:
+    """Finish background memory writes and close the running loop's async pool.
+
+    Call once no workflow is left running on the loop, before closing it.
+    """
+    await drain_pending_writes()
+    await dispose_async_engine()
+
+
+async def run_agent_workflow(
+    task: str,
+    conversation_id: str,
+    messages: list = None,
+    context: dict = None,
+    release_resources: bool = True
+) -> Dict[str, Any]:
+    """
+    Run the agent workflow for a given task.
+
+    Args:
+        task: The user's request/task
+        conversation_id: ID of the conversation
+        messages: Previous messages in the conversation
+        context: Additional context (RAG results, etc.)
+        release_resources: Release the loop's resources afterwards; callers
+            running several workflows on one loop pass False and call
+            release_workflow_resources() themselves
+
+    Returns:
+        Dict with the final response and agent results
+    """
+    # Run the graph
+    try:
+        with conversation_turn():
+            final_state = await agent_graph.ainvoke(_initial_state(task, conversation_id, messages, context))
+    finally:
+        if release_resources:
+            await release_workflow_resources()
+
+    return _workflow_result(final_state)
+
+
+async def stream_agent_workflow(
+    task: str,
+    conversation_id: str,
+    messages: list = None,
+    context: dict = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Run the agent workflow, yielding the synthesized answer as it is generated.
+
+    Yields ``{'type': 'chunk', 'content': ...}`` events followed by one
+    ``{'type': 'result', 'result': ...}`` holding what run_agent_workflow returns.
+    Answers that were not generated token by token (cached, or written by a
+    worker that ended the run) arrive as a single chunk.
+
+    The generator must be consumed within a single task.
+    """
+    streamed = False
+    final_state: Dict[str, Any] = {}
+    try:
+        with conversation_turn():
+            events = agent_graph.astream_events(
+                _initial_state(task, conversation_id, messages, context),
+                version='v2'
+            )
+            async for event in events:
+                kind = event['event']
+                if kind == 'on_chat_model_stream' and event['metadata'].get('langgraph_node') == 'synthesizer':
+                    content = event['data']['chunk'].content
+                    if isinstance(content, str) and content:
+                        streamed = True
+                        yield {'type': 'chunk', 'content': content}
+                elif kind == 'on_chain_end' and not event['parent_ids']:
+                    final_state = event['data']['output']
+    finally:
+        await release_workflow_resources()
+
+    result = _workflow_result(final_state)
+    if not streamed:
+        yield {'type': 'chunk', 'content': result['response']}
+    yield {'type': 'result', 'result': result}
@@ -0,0 +1,86 @@
+"""In-process mirror of an agent's memory embeddings for local similarity search."""
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+class MemoryMirror:
+    """Row-normalized float32 matrix of one agent's memories.
+
+    Similarity is a single matrix-vector product, so small memory stores are
+    searched without a database round trip. The mirror is reloaded from the
+    database every ``refresh_seconds`` to pick up writes from other workers.
+    """
+
+    def __init__(self, dim: int = 1536, refresh_seconds: float = 300.0):
+        self.dim = dim
+        self.refresh_seconds = refresh_seconds
+        self.loaded_at: Optional[float] = None
+        self._matrix = np.empty((0, dim), dtype=np.float32)
+        self._size = 0
+        self._rows: List[Dict[str, Any]] = []
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def is_fresh(self) -> bool:
+        return self.loaded_at is not None and time.monotonic() - self.loaded_at < self.refresh_seconds
+
+    @staticmethod
+    def _normalize(embedding: Sequence[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def load(self, rows: List[Dict[str, Any]], embeddings: List[Sequence[float]]) -> None:
+        """Replace the mirror contents with rows loaded from the database."""
+        self._rows = list(rows)
+        self._size = len(self._rows)
+        self._matrix = np.empty((max(self._size, 16), self.dim), dtype=np.float32)
+        for idx, embedding in enumerate(embeddings):
+            self._matrix[idx] = self._normalize(embedding)
+        self.loaded_at = time.monotonic()
+
+    def add(self, row: Dict[str, Any], embedding: Sequence[float]) -> None:
+        """Append a newly stored memory (no-op until the mirror is loaded)."""
+        if self.loaded_at is None:
+            return
+        if self._size == len(self._matrix):
+            grown = np.empty((max(2 * self._size, 16), self.dim), dtype=np.float32)
+            grown[:self._size] = self._matrix[:self._size]
+            self._matrix = grown
+        self._matrix[self._size] = self._normalize(embedding)
+        self._rows.append(row)
+        self._size += 1
+
+    def search(
+        self,
+        query_embedding: Sequence[float],
+        limit: int,
+        memory_type: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Return the ``limit`` most similar memories, best first."""
+        if not self._size or limit <= 0:
+            return []
+        scores = self._matrix[:self._size] @ self._normalize(query_embedding)
+        if memory_type:
+            mask = np.fromiter(
+                (row['memory_type'] == memory_type for row in self._rows),
+                dtype=bool,
+                count=self._size
+            )
+            scores = np.where(mask, scores, -np.inf)
+
+        if limit < self._size:
+            top = np.argpartition(-scores, limit)[:limit]
+        else:
+            top = np.arange(self._size)
+        top = top[np.argsort(-scores[top])]
+
+        return [
+            {**self._rows[idx], 'similarity': float(scores[idx])}
+            for idx in top
+            if scores[idx] != -np.inf
+        ]
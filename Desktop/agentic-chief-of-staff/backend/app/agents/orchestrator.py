@@ -1,12 +1,30 @@
 """Master Orchestrator Agent - The Chief of Staff that delegates to specialized agents."""
-import json
-import uuid
+import asyncio
+import re
 from typing import Dict, Any, List, Optional
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
 
 from app.agents.base import BaseAgent, AgentState, AgentResponse
 from app.config import settings
-from app.models.database import db_session, Conversation
+
+# Unambiguous transcript-export requests, routed without a planning call
+_PDF_REQUEST_RE = re.compile(r"\bpdf\b|transcript|chat history|conversation history|save chat")
+
+# Phrasing that suggests the user wants advice or a choice, not one routed action
+_AMBIGUITY_RE = re.compile(r"\?|\bor\b|\bhelp me\b")
+# Longer requests tend to mix several asks, so they always get a planning call
+_FAST_ROUTE_MAX_WORDS = 12
+
+# Built once so every synthesis call sends a byte-identical, cacheable prompt prefix
+_SYNTHESIS_SYSTEM_MSG = SystemMessage(content="""You are synthesizing results from multiple AI agents into a cohesive, helpful response for the user.
+
+Guidelines:
+- Combine information from all agents naturally
+- Highlight the most important findings
+- Use clear formatting (bullet points, sections) when helpful
+- Be concise but comprehensive
+- If there were any errors, mention them briefly
+- End with any recommended next steps if applicable""")
 
 
 class MasterOrchestrator(BaseAgent):
@@ -60,6 +78,24 @@ Response Format (JSON):
     "reasoning": "Brief explanation of your decision"
 }"""
 
+    _USER_TMPL = """
+{context}
+{memory_context}
+
+User's Current Request: {task}
+
+Analyze this request and provide your delegation plan in the specified JSON format.
+"""
+
+    _SYNTHESIS_TMPL = """
+Original User Request: {task}
+
+Results from Specialized Agents:
+{results_summary}
+
+Please synthesize these results into a cohesive response for the user.
+"""
+
     def __init__(self):
         super().__init__(
             name="orchestrator",
@@ -101,33 +137,33 @@ Response Format (JSON):
                 "description": "Exports chat transcript as a PDF"
             }
         }
+        # One alternation per agent, so each agent costs a single scan of the task
+        self._keyword_patterns: Dict[str, re.Pattern] = {
+            agent_name: re.compile("|".join(map(re.escape, agent_info["keywords"])))
+            for agent_name, agent_info in self.agent_registry.items()
+        }
+        # Whole-word variants for the fast route, which skips planning on a single
+        # hit: "cc" must not match "account", nor "data" match "update"
+        self._keyword_word_patterns: Dict[str, re.Pattern] = {
+            agent_name: re.compile(r"\b(?:" + "|".join(map(re.escape, agent_info["keywords"])) + r")\b")
+            for agent_name, agent_info in self.agent_registry.items()
+        }
 
     async def process(self, state: AgentState) -> AgentResponse:
         """Process user request and determine delegations."""
         conversation_id = state.get('conversation_id')
         if conversation_id:
-            session = db_session()
-            try:
-                conversation = session.query(Conversation).filter(
-                    Conversation.id == uuid.UUID(conversation_id)
-                ).first()
-                pending_event = None
-                if conversation and conversation.metadata_:
-                    pending_event = conversation.metadata_.get("pending_event")
-                if pending_event:
-                    return AgentResponse(
-                        agent_name=self.name,
-                        status='delegated',
-                        message="Continuing the pending calendar request.",
-                        next_agent='calendar',
-                        data={'pending_event': True}
-                    )
-            finally:
-                session.close()
+            if self._get_conversation_metadata(conversation_id, 'pending_event'):
+                return AgentResponse(
+                    agent_name=self.name,
+                    status='delegated',
+                    message="Continuing the pending calendar request.",
+                    next_agent='calendar',
+                    data={'pending_event': True}
+                )
 
         task_lower = (state.get('task') or '').lower()
-        calendar_keywords = self.agent_registry.get("calendar", {}).get("keywords", [])
-        if any(keyword in task_lower for keyword in calendar_keywords):
+        if self._keyword_patterns["calendar"].search(task_lower):
             return AgentResponse(
                 agent_name=self.name,
                 status='delegated',
@@ -136,47 +172,61 @@ Response Format (JSON):
                 data={'decision': {'delegations': [{'agent': 'CALENDAR', 'task': state.get('task', '')}]}}
             )
 
+        # The PDF agent only builds a link, so a plain export request needs no LLM decision
+        if _PDF_REQUEST_RE.search(task_lower) and not any(
+            pattern.search(task_lower)
+            for agent_name, pattern in self._keyword_patterns.items()
+            if agent_name != 'pdf'
+        ):
+            return AgentResponse(
+                agent_name=self.name,
+                status='delegated',
+                message="Routing to PDF export.",
+                next_agent='pdf',
+                data={'decision': {'delegations': [{'agent': 'PDF', 'task': state.get('task', '')}]}}
+            )
+
+        fast_agent = self._try_fast_route(task_lower)
+        if fast_agent:
+            return AgentResponse(
+                agent_name=self.name,
+                status='delegated',
+                message=f"Routing to {fast_agent}.",
+                next_agent=fast_agent,
+                data={'decision': {'delegations': [{'agent': fast_agent.upper(), 'task': state.get('task', '')}]}}
+            )
+
+        # Retrieve relevant memories while the prompt context is built
+        memories_task = asyncio.create_task(self.retrieve_memories(state['task'], limit=3))
+
         # Build context from state
         context = self._build_context(state)
 
-        # Retrieve relevant memories
-        memories = await self.retrieve_memories(state['task'], limit=3)
+        memories = await memories_task
         memory_context = ""
         if memories:
-            memory_context = "\n\nRelevant Past Context:\n" + "\n".join([
-                f"- {m['content']}" for m in memories
-            ])
+            memory_context = "".join(("\n\nRelevant Past Context:", *(f"\n- {m['content']}" for m in memories)))
 
         # Prepare messages for LLM
         messages = [
-            SystemMessage(content=self.system_prompt),
-            HumanMessage(content=f"""
-{context}
-{memory_context}
-
-User's Current Request: {state['task']}
-
-Analyze this request and provide your delegation plan in the specified JSON format.
-""")
+            self._system_msg,
+            HumanMessage(content=self._USER_TMPL.format_map({
+                'context': context,
+                'memory_context': memory_context,
+                'task': state['task']
+            }))
         ]
 
         # Get LLM response
-        response_text = await self._call_llm(messages)
+        response_text = await self._call_llm(messages, json_mode=True)
 
         # Parse the response
-        try:
-            # Extract JSON from response
-            json_start = response_text.find('{')
-            json_end = response_text.rfind('}') + 1
-            if json_start != -1 and json_end > json_start:
-                decision = json.loads(response_text[json_start:json_end])
-            else:
-                decision = self._fallback_analysis(state['task'])
-        except json.JSONDecodeError:
+        decision = self._parse_json_response(response_text)
+        if decision is None:
             decision = self._fallback_analysis(state['task'])
 
         # Store this interaction in memory
-        await self.store_memory(
+        self.store_memory_in_background(
             content=f"User request: {state['task']} | Decision: {decision.get('understanding', '')}",
             memory_type='episodic',
             conversation_id=state.get('conversation_id'),
@@ -214,22 +264,28 @@ Analyze this request and provide your delegation plan in the specified JSON form
             next_agent=next_agent
         )
 
+    def _try_fast_route(self, task_lower: str) -> Optional[str]:
+        """Return the only agent a short, unambiguous request can mean, else None."""
+        if len(task_lower.split()) >= _FAST_ROUTE_MAX_WORDS or _AMBIGUITY_RE.search(task_lower):
+            return None
+        matches = [name for name, pattern in self._keyword_word_patterns.items() if pattern.search(task_lower)]
+        return matches[0] if len(matches) == 1 else None
+
     def _fallback_analysis(self, task: str) -> Dict[str, Any]:
         """Fallback analysis using keyword matching."""
         task_lower = task.lower()
 
         # Find matching agents
-        matching_agents = []
-        for agent_name, agent_info in self.agent_registry.items():
-            for keyword in agent_info['keywords']:
-                if keyword in task_lower:
-                    matching_agents.append({
-                        'agent': agent_name.upper(),
-                        'task': task,
-                        'priority': 1,
-                        'context': 'Keyword match fallback'
-                    })
-                    break
+        matching_agents = [
+            {
+                'agent': agent_name.upper(),
+                'task': task,
+                'priority': 1,
+                'context': 'Keyword match fallback'
+            }
+            for agent_name, pattern in self._keyword_patterns.items()
+            if pattern.search(task_lower)
+        ]
 
         if not matching_agents:
             # Default to research agent for general queries
@@ -261,30 +317,20 @@ Analyze this request and provide your delegation plan in the specified JSON form
                 thoughts=['No results from delegated agents']
             )
 
-        # Build synthesis prompt
+        # Build synthesis prompt from what each agent told the user; the raw data
+        # stays in the response instead of being serialized into the prompt
+        limit = settings.SYNTHESIS_RESULT_CHARS
         results_summary = "\n".join([
-            f"- {r.get('agent_name', 'Unknown')}: {r.get('message', '')} | Data: {json.dumps(r.get('data', {}))}"
+            f"- {r.get('agent_name', 'Unknown')}: {r.get('message', '')[:limit]}"
             for r in results
         ])
 
         messages = [
-            SystemMessage(content="""You are synthesizing results from multiple AI agents into a cohesive, helpful response for the user.
-
-Guidelines:
-- Combine information from all agents naturally
-- Highlight the most important findings
-- Use clear formatting (bullet points, sections) when helpful
-- Be concise but comprehensive
-- If there were any errors, mention them briefly
-- End with any recommended next steps if applicable"""),
-            HumanMessage(content=f"""
-Original User Request: {state['task']}
-
-Results from Specialized Agents:
-{results_summary}
-
-Please synthesize these results into a cohesive response for the user.
-""")
+            _SYNTHESIS_SYSTEM_MSG,
+            HumanMessage(content=self._SYNTHESIS_TMPL.format_map({
+                'task': state['task'],
+                'results_summary': results_summary
+            }))
         ]
 
         synthesized_response = await self._call_llm(messages)
@@ -4,6 +4,9 @@ from typing import Dict, Any
 from app.agents.base import BaseAgent, AgentState, AgentResponse
 from app.config import settings
 
+# Settings are loaded once per process
+_EXPORT_BASE_URL = settings.PUBLIC_API_URL.rstrip("/")
+
 
 class PdfAgent(BaseAgent):
     """Agent that provides a PDF download link for the current conversation."""
@@ -32,8 +35,7 @@ Do not summarize or modify the conversation content; just return the link.
                 clarification_question="Which conversation would you like to export?"
             )
 
-        base_url = settings.PUBLIC_API_URL.rstrip("/")
-        download_url = f"{base_url}/api/conversations/{conversation_id}/export/pdf"
+        download_url = f"{_EXPORT_BASE_URL}/api/conversations/{conversation_id}/export/pdf"
 
         return AgentResponse(
             agent_name=self.name,
@@ -1,7 +1,7 @@
 """Research Agent - Conducts research, gathers information, and provides insights."""
-import json
+import asyncio
 from typing import Dict, Any, List
-from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.messages import HumanMessage
 
 from app.agents.base import BaseAgent, AgentState, AgentResponse
 
@@ -54,6 +54,17 @@ Response Format (JSON):
     "response_to_user": "Natural language response with findings"
 }"""
 
+    _USER_TMPL = """
+{context}
+{memory_context}
+{rag_context}
+
+User's Research Request: {task}
+
+Conduct thorough research on this topic and provide your response in the specified JSON format.
+Include key insights, findings, and actionable recommendations.
+"""
+
     def __init__(self):
         super().__init__(
             name="research",
@@ -73,54 +84,45 @@ Response Format (JSON):
     async def process(self, state: AgentState) -> AgentResponse:
         """Process research-related requests."""
 
+        # Retrieve relevant research memories while the prompt context is built
+        memories_task = asyncio.create_task(self.retrieve_memories(state['task'], limit=5))
+
         context = self._build_context(state)
 
-        # Retrieve relevant research memories
-        memories = await self.retrieve_memories(state['task'], limit=5)
+        memories = await memories_task
         memory_context = ""
         if memories:
-            memory_context = "\n\nPrevious Research Context:\n" + "\n".join([
-                f"- {m['content']}" for m in memories
-            ])
+            memory_context = "".join(("\n\nPrevious Research Context:", *(f"\n- {m['content']}" for m in memories)))
 
         # Check for RAG context
         rag_context = ""
         if state.get('task_context', {}).get('rag_results'):
             rag_results = state['task_context']['rag_results']
-            rag_context = "\n\nRelevant Document Context:\n" + "\n".join([
-                f"- {r.get('content', '')[:500]}..." for r in rag_results[:3]
-            ])
+            rag_context = "".join((
+                "\n\nRelevant Document Context:",
+                *(f"\n- {r.get('content', '')[:500]}..." for r in rag_results[:3])
+            ))
 
         messages = [
-            SystemMessage(content=self.system_prompt),
-            HumanMessage(content=f"""
-{context}
-{memory_context}
-{rag_context}
-
-User's Research Request: {state['task']}
-
-Conduct thorough research on this topic and provide your response in the specified JSON format.
-Include key insights, findings, and actionable recommendations.
-""")
+            self._system_msg,
+            HumanMessage(content=self._USER_TMPL.format_map({
+                'context': context,
+                'memory_context': memory_context,
+                'rag_context': rag_context,
+                'task': state['task']
+            }))
         ]
 
-        response_text = await self._call_llm(messages)
+        response_text = await self._call_llm(messages, json_mode=True)
 
         # Parse response
-        try:
-            json_start = response_text.find('{')
-            json_end = response_text.rfind('}') + 1
-            if json_start != -1 and json_end > json_start:
-                result = json.loads(response_text[json_start:json_end])
-            else:
-                result = self._create_default_response(state['task'], response_text)
-        except json.JSONDecodeError:
+        result = self._parse_json_response(response_text)
+        if result is None:
             result = self._create_default_response(state['task'], response_text)
 
         # Store important research in memory
         if result.get('key_insights'):
-            await self.store_memory(
+            self.store_memory_in_background(
                 content=f"Research on '{result.get('topic', state['task'][:50])}': {'; '.join(result.get('key_insights', [])[:3])}",
                 memory_type='semantic',
                 conversation_id=state.get('conversation_id'),
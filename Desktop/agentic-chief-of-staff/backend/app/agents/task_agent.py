@@ -1,11 +1,15 @@
 """Task Agent - Manages to-do lists, projects, and productivity tracking."""
-import json
+import asyncio
 from datetime import datetime, timedelta
-from typing import Dict, Any, List
-from langchain_core.messages import HumanMessage, SystemMessage
+from itertools import islice
+from types import MappingProxyType
+from typing import Dict, Any, List, Optional
+from langchain_core.messages import HumanMessage
 
 from app.agents.base import BaseAgent, AgentState, AgentResponse
 
+_STATUS_EMOJI = MappingProxyType({'pending': '⏳', 'in_progress': '🔄', 'completed': '✅', 'blocked': '🚫'})
+
 
 class TaskAgent(BaseAgent):
     """
@@ -67,6 +71,10 @@ Response Format (JSON):
     "response_to_user": "Natural language response"
 }"""
 
+    # "Complete task 3" and "complete task 4" embed almost identically, and the
+    # cached JSON drives task changes
+    SEMANTIC_CACHE_MATCHING = False
+
     def __init__(self):
         super().__init__(
             name="task",
@@ -86,14 +94,20 @@ Response Format (JSON):
         # Simulated task storage (in production, integrate with task management systems)
         self.tasks: Dict[str, Dict] = {}
         self.projects: Dict[str, Dict] = {}
+        # Ids stay unique even if tasks are ever removed from self.tasks
+        self._next_id = 0
+        # Rendered task list for the prompt; reset whenever self.tasks changes
+        self._tasks_context: Optional[str] = None
 
     async def process(self, state: AgentState) -> AgentResponse:
         """Process task-related requests."""
 
+        # Retrieve relevant task memories while the prompt context is built
+        memories_task = asyncio.create_task(self.retrieve_memories(state['task'], limit=3))
+
         context = self._build_context(state)
 
-        # Retrieve relevant task memories
-        memories = await self.retrieve_memories(state['task'], limit=3)
+        memories = await memories_task
         memory_context = ""
         if memories:
             memory_context = "\n\nPrevious Task Context:\n" + "\n".join([
@@ -104,7 +118,7 @@ Response Format (JSON):
         task_list_context = self._get_current_tasks_context()
 
         messages = [
-            SystemMessage(content=self.system_prompt),
+            self._system_msg,
             HumanMessage(content=f"""
 {context}
 {memory_context}
@@ -119,17 +133,11 @@ For new tasks, create actionable items with clear descriptions and priorities.
 """)
         ]
 
-        response_text = await self._call_llm(messages)
+        response_text = await self._call_llm(messages, json_mode=True)
 
         # Parse response
-        try:
-            json_start = response_text.find('{')
-            json_end = response_text.rfind('}') + 1
-            if json_start != -1 and json_end > json_start:
-                result = json.loads(response_text[json_start:json_end])
-            else:
-                result = self._create_default_response(state['task'])
-        except json.JSONDecodeError:
+        result = self._parse_json_response(response_text)
+        if result is None:
             result = self._create_default_response(state['task'])
 
         # Execute task actions
@@ -142,7 +150,7 @@ For new tasks, create actionable items with clear descriptions and priorities.
             self._update_tasks(result.get('tasks', []))
 
         # Store interaction in memory
-        await self.store_memory(
+        self.store_memory_in_background(
             content=f"Task action: {action} - {state['task'][:100]}",
             memory_type='episodic',
             conversation_id=state.get('conversation_id'),
@@ -165,26 +173,31 @@ For new tasks, create actionable items with clear descriptions and priorities.
 
     def _get_current_tasks_context(self) -> str:
         """Get formatted current tasks context."""
-        if not self.tasks:
-            return "No current tasks."
-
-        lines = []
-        for task_id, task in list(self.tasks.items())[:10]:
-            status_emoji = {'pending': '⏳', 'in_progress': '🔄', 'completed': '✅', 'blocked': '🚫'}.get(task.get('status', 'pending'), '📋')
-            lines.append(f"{status_emoji} [{task.get('priority', 'medium')}] {task.get('title', 'Untitled')} - Due: {task.get('due_date', 'No date')}")
-
-        return "\n".join(lines) if lines else "No current tasks."
+        if self._tasks_context is None:
+            lines = [
+                f"{_STATUS_EMOJI.get(task.get('status', 'pending'), '📋')} [{task.get('priority', 'medium')}] "
+                f"{task.get('title', 'Untitled')} - Due: {task.get('due_date', 'No date')}"
+                for task in islice(self.tasks.values(), 10)
+            ]
+            self._tasks_context = "\n".join(lines) if lines else "No current tasks."
+        return self._tasks_context
+
+    def _new_task_id(self) -> str:
+        self._next_id += 1
+        return f"task_{self._next_id}"
 
     def _create_tasks(self, tasks: List[Dict]):
         """Create new tasks."""
+        self._tasks_context = None
         for task in tasks:
-            task_id = task.get('id', f"task_{len(self.tasks) + 1}")
+            task_id = task.get('id') or self._new_task_id()
             task['id'] = task_id
             task['created_at'] = datetime.now().isoformat()
             self.tasks[task_id] = task
 
     def _complete_tasks(self, tasks: List[Dict]):
         """Mark tasks as complete."""
+        self._tasks_context = None
         for task in tasks:
             task_id = task.get('id')
             if task_id and task_id in self.tasks:
@@ -193,6 +206,7 @@ For new tasks, create actionable items with clear descriptions and priorities.
 
     def _update_tasks(self, tasks: List[Dict]):
         """Update existing tasks."""
+        self._tasks_context = None
         for task in tasks:
             task_id = task.get('id')
             if task_id and task_id in self.tasks:
@@ -204,7 +218,7 @@ For new tasks, create actionable items with clear descriptions and priorities.
             'action': 'create',
             'tasks': [
                 {
-                    'id': f"task_{len(self.tasks) + 1}",
+                    'id': self._new_task_id(),
                     'title': task[:100],
                     'description': task,
                     'priority': 'medium',
@@ -1,8 +1,11 @@
 """Agents API endpoints."""
 import uuid
+from collections import defaultdict
 from flask import Blueprint, request, jsonify
+from sqlalchemy import func
+from sqlalchemy.orm import load_only
 
-from app.models.database import db_session, Agent, AgentMemory
+from app.models.database import get_db_session, Agent, AgentMemory
 from app.utils.logger import get_logger
 
 bp = Blueprint('agents', __name__)
@@ -13,9 +16,11 @@ logger = get_logger(__name__)
 @bp.route('/', methods=['GET'])
 def list_agents():
     """List all registered agents."""
-    session = db_session()
-    try:
-        agents = session.query(Agent).filter(Agent.is_active == True).all()
+    with get_db_session() as session:
+        agents = session.query(Agent).options(load_only(
+            Agent.id, Agent.name, Agent.display_name, Agent.description,
+            Agent.agent_type, Agent.capabilities, Agent.is_active
+        )).filter(Agent.is_active == True).all()
 
         return jsonify({
             'agents': [
@@ -32,15 +37,11 @@ def list_agents():
             ]
         })
 
-    finally:
-        session.close()
-
 
 @bp.route('/<agent_id>', methods=['GET'])
 def get_agent(agent_id):
     """Get details of a specific agent."""
-    session = db_session()
-    try:
+    with get_db_session() as session:
         agent = session.query(Agent).filter(
             Agent.id == uuid.UUID(agent_id)
         ).first()
@@ -68,9 +69,6 @@ def get_agent(agent_id):
             'updated_at': agent.updated_at.isoformat()
         })
 
-    finally:
-        session.close()
-
 
 @bp.route('/<agent_id>/memories', methods=['GET'])
 def get_agent_memories(agent_id):
@@ -78,18 +76,28 @@ def get_agent_memories(agent_id):
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 20, type=int)
     memory_type = request.args.get('type')
+    # ?fields=summary leaves out the full memory text
+    include_content = request.args.get('fields') != 'summary'
 
-    session = db_session()
-    try:
-        agent = session.query(Agent).filter(
+    with get_db_session() as session:
+        agent_uuid = session.query(Agent.id).filter(
             Agent.id == uuid.UUID(agent_id)
-        ).first()
+        ).scalar()
 
-        if not agent:
+        if not agent_uuid:
             return jsonify({'error': 'Agent not found'}), 404
 
-        query = session.query(AgentMemory).filter(
-            AgentMemory.agent_id == agent.id
+        # The embedding is never returned, so it is not loaded either
+        columns = [
+            AgentMemory.id, AgentMemory.memory_type, AgentMemory.summary, AgentMemory.importance,
+            AgentMemory.access_count, AgentMemory.metadata_, AgentMemory.created_at,
+            AgentMemory.last_accessed
+        ]
+        if include_content:
+            columns.append(AgentMemory.content)
+
+        query = session.query(AgentMemory).options(load_only(*columns)).filter(
+            AgentMemory.agent_id == agent_uuid
         )
 
         if memory_type:
@@ -100,21 +108,24 @@ def get_agent_memories(agent_id):
             AgentMemory.created_at.desc()
         ).offset((page - 1) * per_page).limit(per_page).all()
 
+        serialized = []
+        for mem in memories:
+            item = {
+                'id': str(mem.id),
+                'memory_type': mem.memory_type,
+                'summary': mem.summary,
+                'importance': mem.importance,
+                'access_count': mem.access_count,
+                'metadata': mem.metadata_,
+                'created_at': mem.created_at.isoformat(),
+                'last_accessed': mem.last_accessed.isoformat() if mem.last_accessed else None
+            }
+            if include_content:
+                item['content'] = mem.content
+            serialized.append(item)
+
         return jsonify({
-            'memories': [
-                {
-                    'id': str(mem.id),
-                    'memory_type': mem.memory_type,
-                    'content': mem.content,
-                    'summary': mem.summary,
-                    'importance': mem.importance,
-                    'access_count': mem.access_count,
-                    'metadata': mem.metadata_,
-                    'created_at': mem.created_at.isoformat(),
-                    'last_accessed': mem.last_accessed.isoformat() if mem.last_accessed else None
-                }
-                for mem in memories
-            ],
+            'memories': serialized,
             'pagination': {
                 'page': page,
                 'per_page': per_page,
@@ -123,15 +134,11 @@ def get_agent_memories(agent_id):
             }
         })
 
-    finally:
-        session.close()
-
 
 @bp.route('/<agent_id>/memories', methods=['DELETE'])
 def clear_agent_memories(agent_id):
     """Clear all memories for an agent."""
-    session = db_session()
-    try:
+    with get_db_session() as session:
         agent = session.query(Agent).filter(
             Agent.id == uuid.UUID(agent_id)
         ).first()
@@ -149,41 +156,35 @@ def clear_agent_memories(agent_id):
             'message': f'Cleared {deleted} memories for agent {agent.display_name}'
         })
 
-    finally:
-        session.close()
-
 
 @bp.route('/stats', methods=['GET'])
 def get_agent_stats():
     """Get statistics for all agents."""
-    session = db_session()
-    try:
-        from sqlalchemy import func
-
-        stats = []
-        agents = session.query(Agent).all()
-
-        for agent in agents:
-            memory_stats = session.query(
-                AgentMemory.memory_type,
-                func.count(AgentMemory.id).label('count')
-            ).filter(
-                AgentMemory.agent_id == agent.id
-            ).group_by(AgentMemory.memory_type).all()
-
-            stats.append({
+    with get_db_session() as session:
+        agents = session.query(Agent).options(load_only(
+            Agent.id, Agent.name, Agent.display_name, Agent.agent_type, Agent.is_active
+        )).all()
+
+        # One grouped query for every agent's memory counts
+        memory_counts = defaultdict(dict)
+        for agent_id, memory_type, count in session.query(
+            AgentMemory.agent_id,
+            AgentMemory.memory_type,
+            func.count(AgentMemory.id)
+        ).group_by(AgentMemory.agent_id, AgentMemory.memory_type):
+            memory_counts[agent_id][memory_type] = count
+
+        stats = [
+            {
                 'agent_id': str(agent.id),
                 'agent_name': agent.name,
                 'display_name': agent.display_name,
                 'agent_type': agent.agent_type,
                 'is_active': agent.is_active,
-                'memory_breakdown': {
-                    stat.memory_type: stat.count for stat in memory_stats
-                },
-                'total_memories': sum(stat.count for stat in memory_stats)
-            })
+                'memory_breakdown': memory_counts.get(agent.id, {}),
+                'total_memories': sum(memory_counts.get(agent.id, {}).values())
+            }
+            for agent in agents
+        ]
 
         return jsonify({'agent_stats': stats})
-
-    finally:
-        session.close()
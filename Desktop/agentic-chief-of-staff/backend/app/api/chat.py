@@ -1,11 +1,23 @@
 """Chat API endpoints."""
+import queue
+import threading
 import uuid
+from contextlib import aclosing, contextmanager
 from datetime import datetime
+from typing import Iterator
 from flask import Blueprint, request, jsonify
 import asyncio
-
-from app.agents.graph import run_agent_workflow
-from app.models.database import db_session, Conversation, Message
+import orjson
+from sqlalchemy import select
+
+from app.agents.graph import (
+    release_workflow_resources,
+    run_agent_workflow,
+    stream_agent_workflow,
+    workflow_slots
+)
+from app.config import settings
+from app.models.database import async_db_session, db_session, Conversation, Message
 from app.rag.retriever import RAGRetriever
 from app.utils.logger import get_logger
 
@@ -13,6 +25,147 @@ bp = Blueprint('chat', __name__)
 logger = get_logger(__name__)
 rag_retriever = RAGRetriever()
 
+_SSE_PREFIX = b"data: "
+_SSE_SUFFIX = b"\n\n"
+
+
+def _sse_event(payload: dict) -> bytes:
+    """Encode one Server-Sent Events frame with a JSON payload."""
+    return b"".join((_SSE_PREFIX, orjson.dumps(payload), _SSE_SUFFIX))
+
+
+async def _load_history(conversation_id: uuid.UUID) -> list:
+    """Load a conversation's latest CHAT_HISTORY_LIMIT messages, oldest first."""
+    async with async_db_session() as session:
+        rows = await session.execute(
+            select(Message.id, Message.role, Message.content, Message.agent_name)
+            .where(Message.conversation_id == conversation_id)
+            .order_by(Message.created_at.desc())
+            .limit(settings.CHAT_HISTORY_LIMIT)
+        )
+        history = [
+            {'id': str(message_id), 'role': role, 'content': content, 'agent_name': agent_name}
+            for message_id, role, content, agent_name in rows
+        ]
+    history.reverse()
+    return history
+
+
+async def _retrieve_rag(message: str, document_ids: list = None) -> dict:
+    """Retrieve RAG context, searching more loosely within selected documents."""
+    if document_ids:
+        return await rag_retriever.retrieve_context(
+            message,
+            document_ids=document_ids,
+            similarity_threshold=0.2,
+            max_chunks=8
+        )
+    return await rag_retriever.retrieve_context(message)
+
+
+async def _run_turn(
+    message: str,
+    conversation_id: str,
+    context: dict,
+    use_rag: bool,
+    document_ids: list = None,
+    release_resources: bool = True
+) -> dict:
+    """Add RAG results to context, then run the agent workflow."""
+    try:
+        # History and RAG retrieval are independent, so neither waits on the other
+        if use_rag:
+            messages, rag_result = await asyncio.gather(
+                _load_history(uuid.UUID(conversation_id)),
+                _retrieve_rag(message, document_ids)
+            )
+            if rag_result['has_context']:
+                context['rag_results'] = rag_result['chunks']
+                context['rag_context'] = rag_result['context']
+                context['rag_sources'] = rag_result['sources']
+        else:
+            messages = await _load_history(uuid.UUID(conversation_id))
+
+        return await run_agent_workflow(
+            task=message,
+            conversation_id=conversation_id,
+            messages=messages,
+            context=context,
+            release_resources=False
+        )
+    finally:
+        if release_resources:
+            await release_workflow_resources()
+
+
+@contextmanager
+def _workflow_slot_share(wanted: int) -> Iterator[int]:
+    """Hold one workflow slot plus up to ``wanted - 1`` more that are free right now.
+
+    Yields the number of slots held. Only the first acquire blocks, so two
+    batches can never wait on each other's partial shares.
+    """
+    workflow_slots.acquire()
+    held = 1
+    try:
+        while held < wanted and workflow_slots.acquire(blocking=False):
+            held += 1
+        yield held
+    finally:
+        for _ in range(held):
+            workflow_slots.release()
+
+
+async def _run_turns(turns: list, concurrency: int) -> list:
+    """Run independent turns concurrently; failed turns are returned as their exception."""
+    limit = asyncio.Semaphore(concurrency)
+
+    async def run(turn: dict) -> dict:
+        async with limit:
+            return await _run_turn(**turn, release_resources=False)
+
+    try:
+        return await asyncio.gather(*map(run, turns), return_exceptions=True)
+    finally:
+        await release_workflow_resources()
+
+
+def _drive_stream(
+    events: queue.SimpleQueue,
+    abandoned: threading.Event,
+    message: str,
+    conversation_id: str
+) -> None:
+    """Run a streamed workflow on its own loop, handing events to the SSE generator.
+
+    The workflow slot is held here rather than in the generator, so a slow
+    client never pauses the workflow or keeps its slot; ``None`` marks the end.
+    """
+    async def pump():
+        async with aclosing(stream_agent_workflow(
+            task=message,
+            conversation_id=conversation_id,
+            messages=[],
+            context={}
+        )) as stream:
+            async for event in stream:
+                if abandoned.is_set():
+                    break
+                events.put(event)
+
+    try:
+        with workflow_slots:
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            try:
+                loop.run_until_complete(pump())
+            finally:
+                loop.close()
+    except Exception as e:
+        events.put({'type': 'error', 'message': str(e)})
+    finally:
+        events.put(None)
+
 
 @bp.route('/message', methods=['POST'])
 def send_message():
@@ -64,53 +217,22 @@ def send_message():
             content=message
         )
         session.add(user_message)
+        # Committed before the workflow so no transaction stays open during the
+        # LLM calls; the reply is committed on its own below
         session.commit()
 
-        # Get conversation history
-        history = session.query(Message).filter(
-            Message.conversation_id == conversation.id
-        ).order_by(Message.created_at).all()
-
-        messages = [
-            {'role': msg.role, 'content': msg.content, 'agent_name': msg.agent_name}
-            for msg in history
-        ]
-
-        # Get RAG context if enabled
+        # History, RAG retrieval and the workflow share one event loop, so the
+        # loop's async pool is opened once and disposed when the workflow finishes
         context = additional_context.copy()
-        if use_rag:
+        with workflow_slots:
             loop = asyncio.new_event_loop()
             asyncio.set_event_loop(loop)
-            if document_ids:
-                rag_result = loop.run_until_complete(
-                    rag_retriever.retrieve_context(
-                        message,
-                        document_ids=document_ids,
-                        similarity_threshold=0.2,
-                        max_chunks=8
-                    )
-                )
-            else:
-                rag_result = loop.run_until_complete(
-                    rag_retriever.retrieve_context(message)
+            try:
+                result = loop.run_until_complete(
+                    _run_turn(message, conversation_id, context, use_rag, document_ids)
                 )
-            if rag_result['has_context']:
-                context['rag_results'] = rag_result['chunks']
-                context['rag_context'] = rag_result['context']
-                context['rag_sources'] = rag_result['sources']
-
-        # Run agent workflow
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        result = loop.run_until_complete(
-            run_agent_workflow(
-                task=message,
-                conversation_id=conversation_id,
-                messages=messages,
-                context=context
-            )
-        )
-        loop.close()
+            finally:
+                loop.close()
 
         # Store assistant response
         assistant_message = Message(
@@ -155,6 +277,156 @@ def send_message():
         session.close()
 
 
+@bp.route('/message/batch', methods=['POST'])
+def send_message_batch():
+    """
+    Send several independent messages at once; their turns run concurrently.
+
+    Request body:
+    {
+        "messages": [
+            {"message": "User message", "conversation_id": "optional-uuid", "use_rag": true},
+            ...
+        ]
+    }
+
+    Each conversation may appear at most once per batch. A failed turn is
+    reported in its own entry and does not fail the others.
+    """
+    data = request.get_json()
+    items = (data or {}).get('messages')
+
+    if not isinstance(items, list) or not items or not all(
+        isinstance(item, dict)
+        and isinstance(item.get('message'), str) and item['message']
+        and isinstance(item.get('conversation_id') or '', str)
+        for item in items
+    ):
+        return jsonify({
+            'error': 'messages must be a non-empty list of objects with a message and an optional string conversation_id'
+        }), 400
+    if len(items) > settings.CHAT_BATCH_MAX_MESSAGES:
+        return jsonify({'error': f'At most {settings.CHAT_BATCH_MAX_MESSAGES} messages per batch'}), 400
+
+    try:
+        requested_ids = [uuid.UUID(item['conversation_id']) for item in items if item.get('conversation_id')]
+    except ValueError:
+        return jsonify({'error': 'Invalid conversation_id'}), 400
+    if len(set(requested_ids)) != len(requested_ids):
+        return jsonify({'error': 'Each conversation may appear only once per batch'}), 400
+
+    session = db_session()
+
+    try:
+        # Get or create every conversation with one lookup and one flush
+        existing = {}
+        if requested_ids:
+            existing = {
+                conversation.id: conversation
+                for conversation in session.query(Conversation).filter(Conversation.id.in_(requested_ids))
+            }
+            if len(existing) != len(requested_ids):
+                return jsonify({'error': 'Conversation not found'}), 404
+
+        conversations = []
+        for item in items:
+            if item.get('conversation_id'):
+                conversation = existing[uuid.UUID(item['conversation_id'])]
+            else:
+                message = item['message']
+                conversation = Conversation(
+                    title=message[:50] + '...' if len(message) > 50 else message
+                )
+                session.add(conversation)
+            conversations.append(conversation)
+        session.flush()
+
+        # Committed before the workflow; the replies are committed on their own below
+        conversation_ids = [conversation.id for conversation in conversations]
+        session.add_all([
+            Message(conversation_id=conversation_id, role='user', content=item['message'])
+            for conversation_id, item in zip(conversation_ids, items)
+        ])
+        session.commit()
+
+        turns = [
+            {
+                'message': item['message'],
+                'conversation_id': str(conversation_id),
+                'context': {},
+                'use_rag': item.get('use_rag', True)
+            }
+            for conversation_id, item in zip(conversation_ids, items)
+        ]
+
+        # Each turn in flight holds a workflow slot; a batch takes at most half of
+        # them, so single messages still get through while it runs
+        wanted = min(len(turns), max(1, settings.MAX_CONCURRENT_WORKFLOWS // 2))
+        with _workflow_slot_share(wanted) as concurrency:
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            try:
+                results = loop.run_until_complete(_run_turns(turns, concurrency))
+            finally:
+                loop.close()
+
+        # Store every assistant response with a single commit
+        assistant_messages = {}
+        for conversation_id, result in zip(conversation_ids, results):
+            if isinstance(result, BaseException):
+                continue
+            assistant_messages[conversation_id] = Message(
+                conversation_id=conversation_id,
+                role='assistant',
+                content=result['response'],
+                agent_name=result.get('agent_name'),
+                agent_thoughts=result.get('thoughts'),
+                tool_calls=result.get('tool_calls'),
+                metadata_={
+                    'is_final': result.get('is_final', True),
+                    'iteration_count': result.get('iteration_count', 0)
+                }
+            )
+        session.add_all(assistant_messages.values())
+        session.query(Conversation).filter(Conversation.id.in_(conversation_ids)).update(
+            {Conversation.updated_at: datetime.utcnow()}, synchronize_session=False
+        )
+        session.flush()
+        message_ids = {
+            conversation_id: str(assistant_message.id)
+            for conversation_id, assistant_message in assistant_messages.items()
+        }
+        session.commit()
+
+        responses = []
+        for conversation_id, turn, result in zip(conversation_ids, turns, results):
+            if isinstance(result, BaseException):
+                logger.error(f"Error processing batch message: {result}")
+                responses.append({'conversation_id': str(conversation_id), 'error': str(result)})
+                continue
+            responses.append({
+                'conversation_id': str(conversation_id),
+                'message_id': message_ids[conversation_id],
+                'response': result['response'],
+                'agent': result.get('agent_name', 'unknown'),
+                'thoughts': result.get('thoughts', []),
+                'tool_calls': result.get('tool_calls', []),
+                'is_final': result.get('is_final', True),
+                'needs_clarification': result.get('needs_clarification', False),
+                'clarification_question': result.get('clarification_question'),
+                'sources': turn['context'].get('rag_sources', [])
+            })
+
+        return jsonify({'results': responses}), 200
+
+    except Exception as e:
+        session.rollback()
+        logger.error(f"Error processing message batch: {e}")
+        return jsonify({'error': str(e)}), 500
+    finally:
+        session.close()
+
+
 @bp.route('/stream', methods=['POST'])
 def stream_message():
     """
@@ -170,38 +442,28 @@ def stream_message():
         return jsonify({'error': 'Message is required'}), 400
 
     def generate():
-        # This is a simplified streaming implementation
-        # In production, you'd integrate with LangChain's streaming callbacks
         message = data['message']
         conversation_id = data.get('conversation_id', str(uuid.uuid4()))
 
-        yield f"data: {{'type': 'start', 'conversation_id': '{conversation_id}'}}\n\n"
+        yield _sse_event({'type': 'start', 'conversation_id': conversation_id})
 
+        events: queue.SimpleQueue = queue.SimpleQueue()
+        abandoned = threading.Event()
+        threading.Thread(
+            target=_drive_stream,
+            args=(events, abandoned, message, conversation_id),
+            daemon=True
+        ).start()
         try:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            result = loop.run_until_complete(
-                run_agent_workflow(
-                    task=message,
-                    conversation_id=conversation_id,
-                    messages=[],
-                    context={}
-                )
-            )
-            loop.close()
-
-            # Stream the response in chunks
-            response = result['response']
-            chunk_size = 50
-
-            for i in range(0, len(response), chunk_size):
-                chunk = response[i:i + chunk_size]
-                yield f"data: {{'type': 'chunk', 'content': '{chunk}'}}\n\n"
-
-            yield f"data: {{'type': 'end', 'agent': '{result.get('agent_name', 'unknown')}'}}\n\n"
-
-        except Exception as e:
-            yield f"data: {{'type': 'error', 'message': '{str(e)}'}}\n\n"
+            while (event := events.get()) is not None:
+                # Chunk and error events already have their wire shape
+                if event['type'] == 'result':
+                    yield _sse_event({'type': 'end', 'agent': event['result'].get('agent_name', 'unknown')})
+                else:
+                    yield _sse_event(event)
+        finally:
+            # The client may disconnect mid-stream
+            abandoned.set()
 
     return Response(
         stream_with_context(generate()),
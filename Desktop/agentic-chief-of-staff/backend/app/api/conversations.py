@@ -6,7 +6,7 @@ from flask import Blueprint, request, jsonify, send_file
 import markdown
 from xhtml2pdf import pisa
 
-from app.models.database import db_session, Conversation, Message
+from app.models.database import get_db_session, Conversation, Message
 from app.utils.logger import get_logger
 
 bp = Blueprint('conversations', __name__)
@@ -21,8 +21,7 @@ def list_conversations():
     per_page = request.args.get('per_page', 20, type=int)
     per_page = min(per_page, 100)  # Max 100 per page
 
-    session = db_session()
-    try:
+    with get_db_session() as session:
         # Get total count
         total = session.query(Conversation).count()
 
@@ -63,15 +62,11 @@ def list_conversations():
             }
         })
 
-    finally:
-        session.close()
-
 
 @bp.route('/<conversation_id>', methods=['GET'])
 def get_conversation(conversation_id):
     """Get a specific conversation with messages."""
-    session = db_session()
-    try:
+    with get_db_session() as session:
         conversation = session.query(Conversation).filter(
             Conversation.id == uuid.UUID(conversation_id)
         ).first()
@@ -105,9 +100,6 @@ def get_conversation(conversation_id):
             ]
         })
 
-    finally:
-        session.close()
-
 
 @bp.route('', methods=['POST'])
 @bp.route('/', methods=['POST'])
@@ -115,8 +107,7 @@ def create_conversation():
     """Create a new conversation."""
     data = request.get_json() or {}
 
-    session = db_session()
-    try:
+    with get_db_session() as session:
         conversation = Conversation(
             title=data.get('title', 'New Conversation'),
             metadata_=data.get('metadata', {})
@@ -130,9 +121,6 @@ def create_conversation():
             'created_at': conversation.created_at.isoformat()
         }), 201
 
-    finally:
-        session.close()
-
 
 @bp.route('/<conversation_id>', methods=['PUT'])
 def update_conversation(conversation_id):
@@ -142,8 +130,7 @@ def update_conversation(conversation_id):
     if not data:
         return jsonify({'error': 'No data provided'}), 400
 
-    session = db_session()
-    try:
+    with get_db_session() as session:
         conversation = session.query(Conversation).filter(
             Conversation.id == uuid.UUID(conversation_id)
         ).first()
@@ -168,15 +155,11 @@ def update_conversation(conversation_id):
             'updated_at': conversation.updated_at.isoformat()
         })
 
-    finally:
-        session.close()
-
 
 @bp.route('/<conversation_id>', methods=['DELETE'])
 def delete_conversation(conversation_id):
     """Delete a conversation and all its messages."""
-    session = db_session()
-    try:
+    with get_db_session() as session:
         conversation = session.query(Conversation).filter(
             Conversation.id == uuid.UUID(conversation_id)
         ).first()
@@ -190,9 +173,6 @@ def delete_conversation(conversation_id):
 
         return jsonify({'message': 'Conversation deleted successfully'}), 200
 
-    finally:
-        session.close()
-
 
 @bp.route('/<conversation_id>/messages', methods=['GET'])
 def get_messages(conversation_id):
@@ -200,8 +180,7 @@ def get_messages(conversation_id):
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 50, type=int)
 
-    session = db_session()
-    try:
+    with get_db_session() as session:
         conversation = session.query(Conversation).filter(
             Conversation.id == uuid.UUID(conversation_id)
         ).first()
@@ -240,9 +219,6 @@ def get_messages(conversation_id):
             }
         })
 
-    finally:
-        session.close()
-
 
 def _build_conversation_pdf(conversation: Conversation, messages: list[Message]) -> BytesIO:
     """Render a conversation transcript to PDF."""
@@ -298,8 +274,7 @@ def _build_conversation_pdf(conversation: Conversation, messages: list[Message])
 @bp.route('/<conversation_id>/export/pdf', methods=['GET'])
 def export_conversation_pdf(conversation_id):
     """Export a conversation transcript as PDF."""
-    session = db_session()
-    try:
+    with get_db_session() as session:
         conversation = session.query(Conversation).filter(
             Conversation.id == uuid.UUID(conversation_id)
         ).first()
@@ -319,5 +294,3 @@ def export_conversation_pdf(conversation_id):
             as_attachment=True,
             download_name=filename
         )
-    finally:
-        session.close()
@@ -7,7 +7,7 @@ from flask import Blueprint, request, jsonify
 import asyncio
 
 from app.config import settings
-from app.models.database import db_session, Document, DocumentChunk
+from app.models.database import get_db_session, Document, DocumentChunk
 from app.rag.document_processor import DocumentProcessor
 from app.rag.retriever import RAGRetriever
 from app.utils.logger import get_logger
@@ -26,8 +26,7 @@ def list_documents():
     per_page = request.args.get('per_page', 20, type=int)
     status = request.args.get('status')
 
-    session = db_session()
-    try:
+    with get_db_session() as session:
         query = session.query(Document)
 
         if status:
@@ -65,9 +64,6 @@ def list_documents():
             }
         })
 
-    finally:
-        session.close()
-
 
 @bp.route('', methods=['POST'])
 @bp.route('/', methods=['POST'])
@@ -125,8 +121,7 @@ def upload_document():
 @bp.route('/<document_id>', methods=['GET'])
 def get_document(document_id):
     """Get document details."""
-    session = db_session()
-    try:
+    with get_db_session() as session:
         document = session.query(Document).filter(
             Document.id == uuid.UUID(document_id)
         ).first()
@@ -157,15 +152,11 @@ def get_document(document_id):
             ]
         })
 
-    finally:
-        session.close()
-
 
 @bp.route('/<document_id>', methods=['DELETE'])
 def delete_document(document_id):
     """Delete a document and its chunks."""
-    session = db_session()
-    try:
+    with get_db_session() as session:
         document = session.query(Document).filter(
             Document.id == uuid.UUID(document_id)
         ).first()
@@ -183,9 +174,6 @@ def delete_document(document_id):
 
         return jsonify({'message': 'Document deleted successfully'})
 
-    finally:
-        session.close()
-
 
 @bp.route('/search', methods=['POST'])
 def search_documents():
@@ -3,7 +3,7 @@ import uuid
 import asyncio
 from flask_socketio import emit, join_room, leave_room
 
-from app.agents.graph import run_agent_workflow
+from app.agents.graph import run_agent_workflow, workflow_slots
 from app.rag.retriever import RAGRetriever
 from app.models.database import db_session, Conversation, Message
 from app.utils.logger import get_logger
@@ -100,30 +100,28 @@ def register_handlers(socketio):
                 'message': 'Analyzing your request...'
             }, room=conversation_id)
 
-            # Get RAG context
-            context = {}
-            if use_rag:
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                rag_result = loop.run_until_complete(
-                    rag_retriever.retrieve_context(message)
-                )
-                if rag_result['has_context']:
-                    context['rag_results'] = rag_result['chunks']
-                    context['rag_context'] = rag_result['context']
-
-            # Run agent workflow
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            result = loop.run_until_complete(
-                run_agent_workflow(
+            # RAG retrieval and the workflow share one event loop
+            async def run_turn():
+                context = {}
+                if use_rag:
+                    rag_result = await rag_retriever.retrieve_context(message)
+                    if rag_result['has_context']:
+                        context['rag_results'] = rag_result['chunks']
+                        context['rag_context'] = rag_result['context']
+                return await run_agent_workflow(
                     task=message,
                     conversation_id=conversation_id,
                     messages=messages,
                     context=context
                 )
-            )
-            loop.close()
+
+            with workflow_slots:
+                loop = asyncio.new_event_loop()
+                asyncio.set_event_loop(loop)
+                try:
+                    result = loop.run_until_complete(run_turn())
+                finally:
+                    loop.close()
 
             # Store assistant response
             assistant_msg = Message(
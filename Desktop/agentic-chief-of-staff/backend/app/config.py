@@ -23,6 +23,10 @@ class Settings(BaseSettings):
     OPENAI_API_KEY: str = ""
     OPENAI_MODEL: str = "gpt-4o-mini"
     OPENAI_EMBEDDING_MODEL: str = "text-embedding-3-small"
+    # Stream completions and stop reading once the JSON response object closes
+    LLM_STREAMING: bool = True
+    # Completions in flight at once for one request (parallel agents queue beyond this)
+    MAX_CONCURRENT_LLM_CALLS: int = 4
 
     # CORS
     CORS_ORIGINS: str = "http://localhost:3001"
@@ -37,6 +41,26 @@ class Settings(BaseSettings):
     # Agent Configuration
     MAX_AGENT_ITERATIONS: int = 10
     AGENT_TIMEOUT: int = 120  # seconds
+    MAX_PARALLEL_AGENTS: int = 4  # delegations run concurrently in one turn
+    MAX_CONCURRENT_WORKFLOWS: int = 8  # turns in flight per worker; others wait for a slot
+    CHAT_BATCH_MAX_MESSAGES: int = 20  # messages accepted by one /message/batch request
+    CHAT_HISTORY_LIMIT: int = 20  # latest messages loaded into a chat turn
+    SYNTHESIS_RESULT_CHARS: int = 2000  # per agent result in the synthesis prompt
+
+    # Semantic LLM response cache
+    SEMANTIC_CACHE_ENABLED: bool = True
+    SEMANTIC_CACHE_THRESHOLD: float = 0.87  # cosine similarity
+    SEMANTIC_CACHE_SIZE: int = 256  # entries per agent
+    SEMANTIC_CACHE_TTL_SECONDS: int = 300  # from insertion; hits don't extend it
+
+    # In-process memory search (falls back to pgvector above the row limit)
+    MEMORY_MIRROR_ENABLED: bool = True
+    MEMORY_MIRROR_MAX_ROWS: int = 10000
+    MEMORY_MIRROR_REFRESH_SECONDS: int = 300
+
+    # Per-worker cache of pending draft state read from conversation metadata.
+    # Writes from other workers become visible once an entry expires; 0 disables it.
+    PENDING_STATE_CACHE_SECONDS: float = 10.0
 
     # SMTP (Email sending)
     SMTP_HOST: str = ""
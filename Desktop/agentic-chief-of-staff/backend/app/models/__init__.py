@@ -1,6 +1,8 @@
 # Models package
 from app.models.database import (
     db_session,
+    async_db_session,
+    dispose_async_engine,
     init_db,
     Base,
     Conversation,
@@ -14,6 +16,8 @@ from app.models.database import (
 
 __all__ = [
     'db_session',
+    'async_db_session',
+    'dispose_async_engine',
     'init_db',
     'Base',
     'Conversation',
@@ -1,11 +1,15 @@
 """Database models and session management."""
+import asyncio
 import uuid
+import weakref
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Optional, List
+from typing import Iterator, Optional, List
 from sqlalchemy import create_engine, Column, String, Text, DateTime, Boolean, Integer, ForeignKey, JSON, Float
 from sqlalchemy.dialects.postgresql import UUID, ARRAY
-from sqlalchemy.orm import declarative_base, sessionmaker, relationship, scoped_session
-from pgvector.sqlalchemy import Vector
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, declarative_base, sessionmaker, relationship, scoped_session
+from pgvector.sqlalchemy import Vector, HALFVEC
 
 from app.config import settings
 
@@ -18,10 +22,55 @@ engine = create_engine(
     echo=settings.DEBUG
 )
 
-# Create session factory
-session_factory = sessionmaker(bind=engine)
+# Create session factory. Objects keep their loaded state after commit, so
+# building a response from them doesn't re-select every row.
+session_factory = sessionmaker(bind=engine, expire_on_commit=False)
 db_session = scoped_session(session_factory)
 
+# Async sessions (asyncpg) for agent memory operations
+AsyncSessionLocal = async_sessionmaker(class_=AsyncSession, expire_on_commit=False)
+_async_engines: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncEngine]" = weakref.WeakKeyDictionary()
+
+
+def _async_database_url(url: str) -> str:
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    return url
+
+
+def get_async_engine() -> AsyncEngine:
+    """Get the async engine for the running event loop.
+
+    asyncpg connections are bound to the loop that opened them, so each loop
+    gets its own pool.
+    """
+    loop = asyncio.get_running_loop()
+    engine = _async_engines.get(loop)
+    if engine is None:
+        engine = create_async_engine(
+            _async_database_url(settings.DATABASE_URL),
+            pool_size=20,
+            max_overflow=40,
+            pool_pre_ping=True,
+            echo=settings.DEBUG
+        )
+        _async_engines[loop] = engine
+    return engine
+
+
+def async_db_session() -> AsyncSession:
+    """Create an async session bound to the running loop's engine."""
+    return AsyncSessionLocal(bind=get_async_engine())
+
+
+async def dispose_async_engine() -> None:
+    """Close the running loop's async pool before the loop shuts down."""
+    engine = _async_engines.pop(asyncio.get_running_loop(), None)
+    if engine is not None:
+        await engine.dispose()
+
+
 # Base class for models
 Base = declarative_base()
 Base.query = db_session.query_property()
@@ -113,7 +162,7 @@ class AgentMemory(Base):
     content = Column(Text, nullable=False)
     summary = Column(Text, nullable=True)
     importance = Column(Float, default=0.5)  # 0-1 scale
-    embedding = Column(Vector(1536), nullable=True)  # OpenAI embedding dimension
+    embedding = Column(HALFVEC(1536), nullable=True)  # OpenAI embedding dimension, float16
     metadata_ = Column("metadata", JSON, default=dict)
     access_count = Column(Integer, default=0)
     last_accessed = Column(DateTime, default=datetime.utcnow)
@@ -184,8 +233,9 @@ def init_db():
     Base.metadata.create_all(bind=engine)
 
 
-def get_db_session():
-    """Get database session context manager."""
+@contextmanager
+def get_db_session() -> Iterator[Session]:
+    """Get database session context manager; commits on success, rolls back on error."""
     session = db_session()
     try:
         yield session
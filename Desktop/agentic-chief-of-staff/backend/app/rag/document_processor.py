@@ -7,9 +7,8 @@ import uuid
 from datetime import datetime
 
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_openai import OpenAIEmbeddings
 
-from app.config import settings
+from app.services.embeddings import get_shared_embeddings
 from app.models.database import db_session, Document, DocumentChunk
 
 
@@ -28,10 +27,7 @@ class DocumentProcessor:
     }
 
     def __init__(self):
-        self.embeddings = OpenAIEmbeddings(
-            model=settings.OPENAI_EMBEDDING_MODEL,
-            api_key=settings.OPENAI_API_KEY
-        )
+        self.embeddings = get_shared_embeddings()
 
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=1000,
@@ -3,19 +3,15 @@ from typing import List, Dict, Any, Optional
 import uuid
 from sqlalchemy import text
 
-from app.config import settings
+from app.services.embeddings import embedding_batcher, get_shared_embeddings
 from app.models.database import db_session, DocumentChunk, AgentMemory
-from langchain_openai import OpenAIEmbeddings
 
 
 class VectorStore:
     """Vector store for document chunks and agent memories."""
 
     def __init__(self):
-        self.embeddings = OpenAIEmbeddings(
-            model=settings.OPENAI_EMBEDDING_MODEL,
-            api_key=settings.OPENAI_API_KEY
-        )
+        self.embeddings = get_shared_embeddings()
 
     async def similarity_search(
         self,
@@ -38,8 +34,9 @@ class VectorStore:
         Returns:
             List of matching chunks with similarity scores
         """
-        # Generate query embedding
-        query_embedding = self.embeddings.embed_query(query)
+        # Generate query embedding; awaiting it lets the caller's other lookups
+        # proceed, and agents embedding the same task text reuse the result
+        query_embedding = await embedding_batcher.embed(query)
 
         session = db_session()
 
@@ -6,6 +6,7 @@ from app.services.calendar_service import (
     has_calendar_conflict,
     CalendarSendError,
 )
+from app.services.embeddings import EmbeddingBatcher, embedding_batcher, get_shared_embeddings
 
 __all__ = [
     "send_email",
@@ -15,5 +16,8 @@ __all__ = [
     "add_calendar_event_attendees",
     "has_calendar_conflict",
     "CalendarSendError",
+    "EmbeddingBatcher",
+    "embedding_batcher",
+    "get_shared_embeddings",
 ]
 # Services package
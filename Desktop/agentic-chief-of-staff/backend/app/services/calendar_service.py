@@ -2,7 +2,6 @@
 from typing import Dict, Any, Optional
 from datetime import datetime
 from zoneinfo import ZoneInfo
-from dateutil import parser as date_parser
 from google.oauth2.credentials import Credentials
 from googleapiclient.discovery import build
 
@@ -108,8 +107,8 @@ def has_calendar_conflict(start_iso: str, end_iso: str, timezone: str) -> bool:
     creds = _get_credentials()
     service = build("calendar", "v3", credentials=creds)
     try:
-        start_dt = date_parser.isoparse(start_iso)
-        end_dt = date_parser.isoparse(end_iso)
+        start_dt = datetime.fromisoformat(start_iso)
+        end_dt = datetime.fromisoformat(end_iso)
     except (ValueError, TypeError) as exc:
         raise CalendarSendError(f"Invalid time range: {exc}") from exc
     body = {
@@ -159,8 +158,8 @@ def has_calendar_conflict(start_iso: str, end_iso: str, timezone: str) -> bool:
         end_info = event.get("end", {})
         if "dateTime" in start_info and "dateTime" in end_info:
             try:
-                event_start = date_parser.isoparse(start_info["dateTime"])
-                event_end = date_parser.isoparse(end_info["dateTime"])
+                event_start = datetime.fromisoformat(start_info["dateTime"])
+                event_end = datetime.fromisoformat(end_info["dateTime"])
             except (ValueError, TypeError):
                 continue
         elif "date" in start_info and "date" in end_info:
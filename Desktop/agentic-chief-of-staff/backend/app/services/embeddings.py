@@ -0,0 +1,116 @@
+"""Batched, cached OpenAI embedding requests."""
+import asyncio
+import functools
+import hashlib
+import weakref
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from langchain_openai import OpenAIEmbeddings
+
+from app.config import settings
+
+
+@functools.cache
+def get_shared_embeddings() -> OpenAIEmbeddings:
+    """Get the process-wide OpenAI embeddings client."""
+    return OpenAIEmbeddings(
+        model=settings.OPENAI_EMBEDDING_MODEL,
+        api_key=settings.OPENAI_API_KEY
+    )
+
+
+class _LoopBatch:
+    """Requests waiting on one event loop; futures and timers never cross loops."""
+
+    __slots__ = ("pending", "inflight", "flush_handle")
+
+    def __init__(self):
+        self.pending: List[Tuple[bytes, str]] = []
+        self.inflight: Dict[bytes, asyncio.Future] = {}
+        self.flush_handle: Optional[asyncio.TimerHandle] = None
+
+
+class EmbeddingBatcher:
+    """Coalesce embedding requests into batched API calls with an LRU cache.
+
+    Requests arriving on the same event loop within ``window_seconds`` of each
+    other are sent as a single ``embed_documents`` call; identical texts are
+    served from the cache or share the in-flight request.
+    """
+
+    def __init__(
+        self,
+        embeddings: Optional[OpenAIEmbeddings] = None,
+        max_batch: int = 64,
+        window_seconds: float = 0.02,
+        cache_size: int = 4096,
+        timeout_seconds: float = 30.0
+    ):
+        self.embeddings = embeddings or get_shared_embeddings()
+        self.max_batch = max_batch
+        self.window_seconds = window_seconds
+        self.cache_size = cache_size
+        self.timeout_seconds = timeout_seconds
+        self._cache: "OrderedDict[bytes, List[float]]" = OrderedDict()
+        # Each request runs its own short-lived loop, and several run at once
+        # under gevent, so pending state is kept per loop
+        self._batches: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopBatch]" = weakref.WeakKeyDictionary()
+
+    @staticmethod
+    def _key(text: str) -> bytes:
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+    async def embed(self, text: str) -> List[float]:
+        """Return the embedding for ``text``."""
+        key = self._key(text)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            return cached
+
+        loop = asyncio.get_running_loop()
+        batch = self._batches.get(loop)
+        if batch is None:
+            batch = self._batches[loop] = _LoopBatch()
+
+        future = batch.inflight.get(key)
+        if future is None:
+            future = loop.create_future()
+            batch.inflight[key] = future
+            batch.pending.append((key, text))
+            if len(batch.pending) >= self.max_batch:
+                self._flush(loop, batch)
+            elif batch.flush_handle is None:
+                batch.flush_handle = loop.call_later(self.window_seconds, self._flush, loop, batch)
+        return await asyncio.wait_for(asyncio.shield(future), self.timeout_seconds)
+
+    def _flush(self, loop: asyncio.AbstractEventLoop, batch: _LoopBatch) -> None:
+        if batch.flush_handle is not None:
+            batch.flush_handle.cancel()
+            batch.flush_handle = None
+        texts, batch.pending = batch.pending, []
+        if texts:
+            loop.create_task(self._run_batch(texts, batch.inflight))
+
+    async def _run_batch(self, batch: List[Tuple[bytes, str]], inflight: Dict[bytes, asyncio.Future]) -> None:
+        try:
+            vectors = await asyncio.to_thread(self.embeddings.embed_documents, [text for _, text in batch])
+        except Exception as exc:
+            for key, _ in batch:
+                future = inflight.pop(key, None)
+                if future is not None and not future.done():
+                    future.set_exception(exc)
+            return
+
+        for (key, _), vector in zip(batch, vectors):
+            self._cache[key] = vector
+            self._cache.move_to_end(key)
+            future = inflight.pop(key, None)
+            if future is not None and not future.done():
+                future.set_result(vector)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+
+embedding_batcher = EmbeddingBatcher()
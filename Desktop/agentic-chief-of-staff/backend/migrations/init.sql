@@ -67,7 +67,7 @@ CREATE TABLE IF NOT EXISTS agent_memories (
     content TEXT NOT NULL,
     summary TEXT,
     importance FLOAT DEFAULT 0.5,
-    embedding vector(1536),
+    embedding halfvec(1536),
     metadata JSONB DEFAULT '{}',
     access_count INTEGER DEFAULT 0,
     last_accessed TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
@@ -120,7 +120,9 @@ CREATE TABLE IF NOT EXISTS task_executions (
 -- Create indexes for better performance
 CREATE INDEX IF NOT EXISTS idx_conversations_user_id ON conversations(user_id);
 CREATE INDEX IF NOT EXISTS idx_conversations_updated_at ON conversations(updated_at DESC);
-CREATE INDEX IF NOT EXISTS idx_messages_conversation_id ON messages(conversation_id);
+-- Serves per-conversation lookups and the latest-N history query
+DROP INDEX IF EXISTS idx_messages_conversation_id;
+CREATE INDEX IF NOT EXISTS idx_messages_conversation_created_at ON messages(conversation_id, created_at);
 CREATE INDEX IF NOT EXISTS idx_messages_created_at ON messages(created_at);
 CREATE INDEX IF NOT EXISTS idx_agent_memories_agent_id ON agent_memories(agent_id);
 CREATE INDEX IF NOT EXISTS idx_agent_memories_memory_type ON agent_memories(memory_type);
@@ -130,9 +132,13 @@ CREATE INDEX IF NOT EXISTS idx_document_chunks_document_id ON document_chunks(do
 CREATE INDEX IF NOT EXISTS idx_task_executions_conversation_id ON task_executions(conversation_id);
 CREATE INDEX IF NOT EXISTS idx_task_executions_status ON task_executions(status);
 
--- Create vector indexes for similarity search (using IVFFlat for performance)
-CREATE INDEX IF NOT EXISTS idx_agent_memories_embedding ON agent_memories
-    USING ivfflat (embedding vector_cosine_ops) WITH (lists = 100);
+-- Create vector indexes for similarity search
+-- Agent memories use HNSW: no training step, good recall on small and growing tables
+DROP INDEX IF EXISTS idx_agent_memories_embedding;
+-- Databases created before embeddings were stored at half precision still have vector(1536)
+ALTER TABLE agent_memories ALTER COLUMN embedding TYPE halfvec(1536) USING embedding::halfvec(1536);
+CREATE INDEX IF NOT EXISTS idx_agent_memories_embedding_hnsw ON agent_memories
+    USING hnsw (embedding halfvec_cosine_ops) WITH (m = 16, ef_construction = 64);
 CREATE INDEX IF NOT EXISTS idx_document_chunks_embedding ON document_chunks
     USING ivfflat (embedding vector_cosine_ops) WITH (lists = 100);
 